@@ -0,0 +1,159 @@
+import difflib
+import hashlib
+import os
+import pickle
+import re
+from collections import Counter
+
+# === Configuration Parameters ===
+APP_INDEX_FILE = "app_name_index.pkl"
+MIN_MATCH_CONFIDENCE = 0.9  # fuzzy matches below this are listed for the user, not collected
+SHOW_CANDIDATES = 5  # ranked candidates printed when a name is not matched
+MAX_FUZZY_CANDIDATES = 50  # trigram candidates re-ranked with difflib
+COMMON_TRIGRAM_SHARE = 0.05  # skip trigrams found in more than this share of names
+
+
+def normalize_name(name):
+    """Lowercase alphanumerics only, so 'Frostpunk: 1886' matches 'frostpunk1886'"""
+    return ''.join(ch.lower() for ch in str(name) if ch.isalnum())
+
+
+def trigrams(norm):
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def query_tokens(name):
+    """Lowercase words and numbers of a game name"""
+    return re.findall(r"[a-z0-9]+", str(name).lower())
+
+
+def covers_query(name, candidate):
+    """True if candidate has every number of name as a number and every word of name"""
+    candidate_numbers = set(re.findall(r"\d+", str(candidate)))
+    candidate_norm = normalize_name(candidate)
+    for token in query_tokens(name):
+        if token.isdigit():
+            if token not in candidate_numbers:
+                return False
+        elif token not in candidate_norm:
+            return False
+    return True
+
+
+def apps_signature(apps_map):
+    digest = hashlib.sha1()
+    for name, appid in sorted(apps_map.items(), key=lambda kv: kv[1]):
+        digest.update(f"{appid}\t{name}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class AppNameIndex:
+    """Exact and trigram-fuzzy lookup of appids by game name"""
+
+    def __init__(self, apps_map, signature=None):
+        self.signature = signature or apps_signature(apps_map)
+        self.names = []
+        self.appids = []
+        self.norms = []
+        self.exact = {}  # normalized name -> entry id
+        self.postings = {}  # trigram -> list of entry ids
+        for name, appid in apps_map.items():
+            norm = normalize_name(name)
+            if not norm:
+                continue
+            entry = len(self.names)
+            self.names.append(name)
+            self.appids.append(appid)
+            self.norms.append(norm)
+            current = self.exact.get(norm)
+            # Prefer the lowest appid on collisions (usually the original release)
+            if current is None or appid < self.appids[current]:
+                self.exact[norm] = entry
+            for tri in trigrams(norm):
+                self.postings.setdefault(tri, []).append(entry)
+
+    def candidates(self, norm, limit=MAX_FUZZY_CANDIDATES):
+        """Return entry ids sharing the most trigrams with norm"""
+        query = [self.postings.get(tri, []) for tri in trigrams(norm)]
+        query = [p for p in query if p]
+        if not query:
+            return []
+        max_len = max(1, int(len(self.names) * COMMON_TRIGRAM_SHARE))
+        selective = [p for p in query if len(p) <= max_len] or [min(query, key=len)]
+        counts = Counter()
+        for postings in selective:
+            counts.update(postings)
+        return [entry for entry, _ in counts.most_common(limit)]
+
+    def rank(self, name, limit=MAX_FUZZY_CANDIDATES):
+        """Return [(appid, matched_name, confidence)] of the fuzzy candidates, best first"""
+        norm = normalize_name(name)
+        if not norm:
+            return []
+        ranked = []
+        for entry in self.candidates(norm):
+            candidate = self.norms[entry]
+            score = difflib.SequenceMatcher(None, norm, candidate).ratio()
+            if norm in candidate:
+                # Keep the old substring behaviour as a strong signal
+                score = max(score, 0.5 + 0.5 * len(norm) / len(candidate))
+            ranked.append((round(score, 3), entry))
+        # Ties go to the lowest appid (usually the original release)
+        ranked.sort(key=lambda item: (-item[0], self.appids[item[1]]))
+        return [(self.appids[entry], self.names[entry], score) for score, entry in ranked[:limit]]
+
+    def resolve(self, name):
+        """Return (appid, matched_name, confidence) or (None, None, 0.0)"""
+        norm = normalize_name(name)
+        entry = self.exact.get(norm)
+        if entry is not None:
+            return self.appids[entry], self.names[entry], 1.0
+        ranked = self.rank(name, limit=1)
+        return ranked[0] if ranked else (None, None, 0.0)
+
+def load_name_index(apps_map, path=APP_INDEX_FILE, signature=None):
+    """Load the persisted index if it matches apps_map, otherwise rebuild and save it"""
+    signature = signature or apps_signature(apps_map)
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                index = pickle.load(f)
+            if index.signature == signature:
+                return index
+        except Exception as e:
+            print(f"Ignoring unreadable app name index '{path}': {e}")
+    index = AppNameIndex(apps_map, signature)
+    # A per-process temp name, so concurrent rebuilds never write or rename each other's file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return index
+
+
+def find_appid(index, name, min_confidence=MIN_MATCH_CONFIDENCE):
+    """Lookup AppID by numeric ID input, exact name, or a close fuzzy match.
+
+    A fuzzy match must contain every word and number of the name (so
+    'Frostpunk 1886' never resolves to 'Frostpunk'); otherwise the ranked
+    candidates are printed and None is returned.
+    """
+    name = str(name)
+    if name.isdigit():
+        return int(name)
+    appid, matched, confidence = index.resolve(name)
+    if confidence == 1.0:
+        return appid
+    ranked = index.rank(name)
+    accepted = [c for c in ranked if c[2] >= min_confidence and covers_query(name, c[1])]
+    if accepted:
+        appid, matched, confidence = accepted[0]
+        print(f"Matched '{name}' to '{matched}' (appid {appid}, confidence {confidence:.2f})")
+        return appid
+    print(f"'{name}' wasn't found. Try removing punctuation or inputting the AppID directly.")
+    if ranked:
+        print("Closest candidates:")
+        for appid, matched, confidence in ranked[:SHOW_CANDIDATES]:
+            print(f"  {appid}  {matched}  (confidence {confidence:.2f})")
+    return None
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+from functools import cached_property
+
+import pandas as pd
+
+import app_index
+import steam_http
+
+# === Configuration Parameters ===
+APPLIST_URL = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
+APP_LIST_FILE = "app_list.parquet"
+APP_LIST_MAX_AGE_HOURS = 24  # refresh the cached AppList when older than this
+
+
+class AppList:
+    """Cached Steam AppList with name->appid and appid->name maps built once"""
+
+    def __init__(self, df, signature=None):
+        self.df = df
+        self.signature = signature
+
+    def __len__(self):
+        return len(self.df)
+
+    @cached_property
+    def name_to_appid(self):
+        return dict(zip(self.df['name'].tolist(), self.df['appid'].tolist()))
+
+    @cached_property
+    def appid_to_name(self):
+        return dict(zip(self.df['appid'].tolist(), self.df['name'].tolist()))
+
+    @cached_property
+    def name_index(self):
+        return app_index.load_name_index(self.name_to_appid, signature=self.signature)
+
+
+def _meta_path(path):
+    return path + ".meta.json"
+
+
+def _read_meta(path):
+    if os.path.exists(_meta_path(path)):
+        try:
+            with open(_meta_path(path), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {}
+
+
+def _download(path, meta):
+    """Download the AppList unless the server reports it unchanged; return True if the file was rewritten"""
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    resp = steam_http.get(APPLIST_URL, headers=headers, timeout=60)
+    if resp.status_code == 304 and os.path.exists(path):
+        os.utime(path)
+        return False
+    resp.raise_for_status()
+    apps = resp.json().get('applist', {}).get('apps', [])
+    df = pd.DataFrame(apps, columns=['appid', 'name'])
+    df = df[df['name'].astype(bool)].astype({'appid': 'int64', 'name': 'string'})
+    df = df.sort_values('appid', kind='stable').reset_index(drop=True)
+    df.to_parquet(path + ".tmp", index=False, compression="zstd")
+    os.replace(path + ".tmp", path)
+    new_meta = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "signature": app_index.apps_signature(dict(zip(df['name'], df['appid']))),
+        "apps": len(df),
+    }
+    with open(_meta_path(path), "w", encoding="utf-8") as f:
+        json.dump(new_meta, f)
+    return True
+
+
+def load_app_list(path=APP_LIST_FILE, max_age_hours=APP_LIST_MAX_AGE_HOURS):
+    """Return the AppList from disk, downloading it first if missing or older than max_age_hours"""
+    stale = not os.path.exists(path) or time.time() - os.path.getmtime(path) > max_age_hours * 3600
+    if stale:
+        try:
+            refreshed = _download(path, _read_meta(path))
+            print("Downloaded fresh Steam AppList." if refreshed else "Steam AppList unchanged since last download.")
+        except Exception as e:
+            if not os.path.exists(path):
+                raise
+            print(f"AppList refresh failed ({e}), using cached copy.")
+    df = pd.read_parquet(path)
+    return AppList(df, _read_meta(path).get("signature"))
@@ -0,0 +1,81 @@
+import json
+import os
+import zlib
+from collections import Counter
+
+import pandas as pd
+
+import app_index
+
+# === Configuration Parameters ===
+APP_NAMES_FILE = "app_names.parquet"  # appid -> name dimension table
+TAGS_GENRES_FILE = "game_tags_and_genres.json"
+APP_LIST_FILE = "app_list.parquet"  # app_list_cache output, used if present
+
+
+def load_app_names(path=APP_NAMES_FILE):
+    """Return {appid: name} from the dimension table"""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_parquet(path, columns=['appid', 'name'])
+    return dict(zip(df['appid'].tolist(), df['name'].tolist()))
+
+
+def save_app_names(names, path=APP_NAMES_FILE):
+    df = pd.DataFrame({'appid': list(names.keys()), 'name': list(names.values())})
+    df = df.dropna().astype({'appid': 'int64', 'name': 'string'}).sort_values('appid')
+    df.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+
+def update_app_names(new_names, path=APP_NAMES_FILE):
+    """Merge {appid: name} into the dimension table; newer names win"""
+    names = load_app_names(path)
+    changed = {}
+    for aid, name in new_names.items():
+        if aid is not None and name and names.get(int(aid)) != name:
+            changed[int(aid)] = name
+    if changed:
+        names.update(changed)
+        save_app_names(names, path)
+    return names
+
+
+def legacy_appid(name):
+    """Stable negative surrogate id for a legacy game-name column with no known appid"""
+    return -(zlib.crc32(str(name).encode("utf-8")) & 0x7fffffff) - 1
+
+
+class LegacyNameResolver:
+    """Maps game-name column headers from pre-appid analysis files to appids"""
+
+    def __init__(self, names_path=APP_NAMES_FILE, tags_path=TAGS_GENRES_FILE, app_list_path=APP_LIST_FILE):
+        self.by_name = {}
+        if os.path.exists(app_list_path):
+            df = pd.read_parquet(app_list_path, columns=['appid', 'name'])
+            self.by_name.update(zip(df['name'].tolist(), df['appid'].tolist()))
+        if os.path.exists(tags_path):
+            with open(tags_path, encoding="utf-8") as f:
+                tags = json.load(f)
+            # Some entries were matched fuzzily and share an appid; only trust unambiguous ones
+            owners = Counter(info.get('appid') for info in tags.values() if isinstance(info, dict))
+            for name, info in tags.items():
+                if isinstance(info, dict) and info.get('appid') and owners[info['appid']] == 1:
+                    self.by_name[name] = int(info['appid'])
+        for aid, name in load_app_names(names_path).items():
+            if aid > 0:
+                self.by_name[name] = aid
+        self.by_norm = {}
+        for name, aid in self.by_name.items():
+            self.by_norm.setdefault(app_index.normalize_name(name), aid)
+        self.resolved = {}  # appid -> name for every header seen
+        self.unresolved = 0
+
+    def resolve(self, name):
+        name = str(name)
+        aid = self.by_name.get(name) or self.by_norm.get(app_index.normalize_name(name))
+        if aid is None:
+            aid = legacy_appid(name)
+            self.unresolved += 1
+        self.resolved.setdefault(int(aid), name)
+        return int(aid)
@@ -1,10 +1,23 @@
 import os
-import time
+import re
+import argparse
+import queue
+import threading
+from concurrent.futures import (ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, as_completed, wait)
 from datetime import datetime, timedelta
+from itertools import islice
 from dotenv import load_dotenv, find_dotenv
-import requests
 import pandas as pd
-import json
+import steam_http
+import steamspy
+import steam_profiles
+import steam_reviews
+import app_index
+import app_list_cache
+import app_names
+from owned_games_store import OwnedGamesStore
+from playtime_matrix import PlaytimeMatrix, owned_games_to_long
 
 # === Configuration Parameters ===
 GAME_NAMES = [
@@ -17,136 +30,26 @@ GAME_NAMES = [
 LANGUAGE = "english"
 SAMPLE_SIZE = 1000  # for public profile sampling
 REVIEWS_PER_GAME = 1000  # for review text collection
+INCREMENTAL_REVIEWS = True  # only fetch reviews newer than those already stored
 OUTPUT_FOLDER = "game_data"
+KPI_SUFFIX = "_analysis_kpis.parquet"  # one-row KPI table next to each *_analysis.parquet
+EXCEL_TOP_GAMES = 1000  # the xlsx 'Other Games' sheet shows only the most played games
 REVIEWS_FOLDER = "reviews_data"
-RATE_LIMIT_SECONDS = 1.2
+MAX_IN_FLIGHT = 8  # concurrent profile/owned-games requests (see steam_http.HOST_RATE_LIMITS)
+VISIBILITY_TTL_DAYS = 30  # reuse stored profile visibility checks for this long
+OWNED_GAMES_TTL_DAYS = 30  # reuse landing-zone GetOwnedGames responses for this long
+REVIEW_LOOKBACK_MONTHS = 30  # sample reviewers from at most this far back
+MAX_SAMPLED_REVIEWS = 2000  # reviews paged per language while sampling
+MIN_SAMPLE_SIZE = 500  # keep a sample this large rather than widening to all languages
+CANDIDATE_QUEUE_BATCHES = 2  # steamid batches the review stage may queue ahead of the visibility checks
+OWNED_GAMES_QUEUE = MAX_IN_FLIGHT * 4  # public steamids waiting for GetOwnedGames before the checks pause
 MARKET = "all"  # Set to 'all' for now, can be changed later
 
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 os.makedirs(REVIEWS_FOLDER, exist_ok=True)
 
-def load_app_list():
-    resp = requests.get("https://api.steampowered.com/ISteamApps/GetAppList/v2/")
-    resp.raise_for_status()
-    apps = resp.json().get('applist', {}).get('apps', [])
-    return {app['name']: app['appid'] for app in apps}
-
-def find_appid(apps_map, name):
-    if name.isdigit():
-        return int(name)
-    if name in apps_map:
-        return apps_map[name]
-    norm = ''.join(ch.lower() for ch in name if ch.isalnum())
-    for n, aid in apps_map.items():
-        norm_n = ''.join(ch.lower() for ch in n if ch.isalnum())
-        if norm in norm_n:
-            return aid
-    print(f"'{name}' wasn't found. Try removing punctuation or inputting the AppID directly.")
-    return None
-
-def get_reviews(app_id, market, language, per_page, start_date, end_date, max_reviews):
-    start_ts = int(start_date.timestamp())
-    end_ts = int(end_date.timestamp())
-    reviews, cursor = [], "*"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    max_retries = 5
-    for attempt in range(max_retries):
-        try:
-            resp = requests.get(
-                f"https://store.steampowered.com/appreviews/{app_id}",
-                params={
-                    "json": 1,
-                    "filter": "all",
-                    "language": language,
-                    "purchase_type": "all",
-                    "cc": market,
-                    "num_per_page": per_page,
-                    "cursor": cursor
-                }, headers=headers
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            batch = data.get("reviews", [])
-            if not batch:
-                break
-            for r in batch:
-                ts = r.get('timestamp_created', 0)
-                if ts < start_ts:
-                    return reviews
-                if ts <= end_ts:
-                    reviews.append(r)
-                    if len(reviews) >= max_reviews:
-                        break
-            cursor = data.get('cursor', cursor)
-            time.sleep(0.2)
-        except Exception as e:
-            print(f"Error fetching reviews for {app_id}: {e}")
-            time.sleep(5)
-            continue
-    return reviews
-
-def fetch_reviews_text(appid, max_reviews, out_folder, game_name=None):
-    display_name = f"appid {appid}" if not game_name else f"appid {appid} ('{game_name}')"
-    print(f"Fetching up to {max_reviews} reviews for {display_name}...")
-    reviews = []
-    cursor = "*"
-    total_fetched = 0
-    while total_fetched < max_reviews:
-        params = {
-            "json": 1,
-            "filter": "all",
-            "language": "all",
-            "purchase_type": "all",
-            "num_per_page": min(100, max_reviews - total_fetched),
-            "cursor": cursor
-        }
-        try:
-            resp = requests.get(f"https://store.steampowered.com/appreviews/{appid}", params=params, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            batch = data.get("reviews", [])
-            if not batch:
-                break
-            for r in batch:
-                reviews.append({
-                    "appid": appid,
-                    "steamid": r.get("author", {}).get("steamid"),
-                    "review": r.get("review"),
-                    "timestamp": r.get("timestamp_created"),
-                    "voted_up": r.get("voted_up"),
-                    "playtime_forever": r.get("author", {}).get("playtime_forever"),
-                    "language": r.get("language"),
-                    "review_id": r.get("recommendationid")
-                })
-            total_fetched += len(batch)
-            cursor = data.get("cursor", cursor)
-            print(f"Fetched {total_fetched} reviews so far for {display_name}...")
-            if len(batch) == 0:
-                break
-        except Exception as e:
-            print(f"Error fetching reviews for {display_name}: {e}")
-            break
-        time.sleep(RATE_LIMIT_SECONDS)
-    if reviews:
-        df = pd.DataFrame(reviews)
-        outpath = os.path.join(out_folder, f"reviews_{appid}.parquet")
-        df.to_parquet(outpath, index=False)
-        print(f"Saved {len(reviews)} reviews for {display_name} to {outpath}")
-    else:
-        print(f"No reviews found for {display_name}")
-
-def is_profile_public(api_key, steam_id):
-    resp = requests.get(
-        "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
-        params={"key": api_key, "steamids": steam_id}
-    )
-    if resp.ok:
-        players = resp.json().get('response', {}).get('players', [])
-        return bool(players and players[0].get('communityvisibilitystate') == 3)
-    return False
-
 def get_owned_games(api_key, steam_id):
-    resp = requests.get(
+    resp = steam_http.get(
         "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/",
         params={
             "key": api_key,
@@ -161,134 +64,295 @@ def get_owned_games(api_key, steam_id):
     resp.raise_for_status()
     return resp.json().get('response', {}).get('games', [])
 
-def fetch_kpis_spy(appid):
-    url = f"https://steamspy.com/api.php?request=appdetails&appid={appid}"
-    resp = requests.get(url)
-    if not resp.ok:
+def queue_review_authors(appid, candidates, public, stop, cursors):
+    """Review stage: page recent reviews and queue unseen authors in visibility-check batches.
+
+    Pages newest first in LANGUAGE, then in all languages if the sample is
+    still short, back to REVIEW_LOOKBACK_MONTHS. After each full batch,
+    paging pauses if the confirmed public authors plus the unchecked queued
+    ones could fill SAMPLE_SIZE, and resumes only if the checks leave the
+    sample short. Always ends the queue with None.
+    """
+    oldest_ts = int((datetime.now() - timedelta(days=REVIEW_LOOKBACK_MONTHS * 30)).timestamp())
+    seen = set()
+    batch = []
+    unchecked = 0
+
+    def put(item):
+        # Once the sample is full, batches still being built are dropped instead of queued
+        while not stop.is_set():
+            try:
+                candidates.put(item, timeout=1)
+                return
+            except queue.Full:
+                pass
+
+    def wait_for_checks():
+        nonlocal batch, unchecked
+        if batch:
+            put(batch)
+            batch = []
+        candidates.join()
+        unchecked = 0
+
+    try:
+        for language in dict.fromkeys([LANGUAGE, "all"]):
+            if language != LANGUAGE:
+                wait_for_checks()
+                if stop.is_set() or len(public) >= min(MIN_SAMPLE_SIZE, SAMPLE_SIZE):
+                    break
+                print(f"Not enough public profiles found with language '{LANGUAGE}'. Expanding to all languages...")
+            cursors[language] = steam_reviews.ReviewCursor(appid, language, "recent", MARKET)
+            for rev in islice(cursors[language], MAX_SAMPLED_REVIEWS):
+                if stop.is_set() or rev.get('timestamp_created', 0) < oldest_ts:
+                    break
+                sid = rev.get('author', {}).get('steamid')
+                if not sid or sid in seen:
+                    continue
+                seen.add(sid)
+                batch.append(sid)
+                unchecked += 1
+                if len(batch) >= steam_profiles.MAX_STEAMIDS_PER_REQUEST:
+                    put(batch)
+                    batch = []
+                    if len(public) + unchecked >= SAMPLE_SIZE:
+                        wait_for_checks()
+            print(f"Paged {cursors[language].requests} review pages for appid {appid} (language: {language})")
+        if batch:
+            put(batch)
+    finally:
+        # The visibility stage reads until this marker, even after a failure
+        candidates.put(None)
+
+def fetch_owned_games_stored(api_key, steam_id, games_store):
+    games = get_owned_games(api_key, steam_id)
+    games_store.put(steam_id, games)
+    return games
+
+def sample_public_owners(api_key, appid, game_display_name, visibility_store, games_store):
+    """Pipelined sample of up to SAMPLE_SIZE public reviewers and their owned games.
+
+    Review paging runs in its own thread and feeds steamid batches through
+    a bounded queue to the visibility checks in this thread; each confirmed
+    public steamid is handed straight to a pool fetching GetOwnedGames.
+    Full queues block the stage before them, so no stage runs far ahead.
+    Returns (steamids, {steamid: games}).
+    """
+    candidates = queue.Queue(maxsize=CANDIDATE_QUEUE_BATCHES)
+    public = []
+    stop = threading.Event()
+    cursors = {}
+    producer = threading.Thread(target=queue_review_authors, args=(appid, candidates, public, stop, cursors), daemon=True)
+    producer.start()
+    user_games = {}
+    pending = {}
+    reused = 0
+
+    def collect(return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            sid = pending.pop(future)
+            try:
+                user_games[sid] = future.result()
+            except Exception as e:
+                # One failed profile only shrinks the sample; the review stage keeps finding replacements
+                print(f"Failed to fetch owned games for {sid}, dropping it from the sample: {e}")
+                public.remove(sid)
+
+    with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as pool:
+        try:
+            while True:
+                batch = candidates.get()
+                try:
+                    if batch is None:
+                        break
+                    if stop.is_set():
+                        continue
+                    public_ids = steam_profiles.resolve_public_steamids(api_key, batch, MAX_IN_FLIGHT, store=visibility_store)
+                    for sid in batch:
+                        if sid not in public_ids or len(public) >= SAMPLE_SIZE:
+                            continue
+                        public.append(sid)
+                        glist = games_store.get(sid)
+                        if glist is not None:
+                            user_games[sid] = glist
+                            reused += 1
+                            continue
+                        if len(pending) >= OWNED_GAMES_QUEUE:
+                            collect(FIRST_COMPLETED)
+                        pending[pool.submit(fetch_owned_games_stored, api_key, sid, games_store)] = sid
+                    print(f"Accumulated {len(public)} unique public users for '{game_display_name}'")
+                    if len(public) >= SAMPLE_SIZE:
+                        # Stop the review stage only once the in-flight fetches have confirmed the sample
+                        collect(ALL_COMPLETED)
+                    if len(public) >= SAMPLE_SIZE:
+                        stop.set()
+                finally:
+                    candidates.task_done()
+            collect(ALL_COMPLETED)
+        finally:
+            stop.set()
+            # Unblock the review stage if this stage failed part-way
+            while producer.is_alive() or not candidates.empty():
+                try:
+                    candidates.get(timeout=0.1)
+                    candidates.task_done()
+                except queue.Empty:
+                    pass
+            for future in pending:
+                future.cancel()
+    print(f"Review pages requested for '{game_display_name}': {sum(c.requests for c in cursors.values())}")
+    print(f"Reused {reused} owned-games lists from the landing zone, fetched {len(public) - reused}")
+    return public, user_games
+
+def export_analysis(appid, game_display_name, kpis, steamids, user_games):
+    """Write the analysis files and return the {appid: name} pairs seen in the sample"""
+    df_long = owned_games_to_long({sid: user_games[sid] for sid in steamids})
+    if df_long.empty:
+        print(f"No 'other games' data for '{game_display_name}', skipping export.")
+        return {appid: game_display_name}
+    matrix = PlaytimeMatrix.from_long(df_long, steamids)
+    print(f"Total unique 'other games' encountered: {matrix.shape[1]} ({matrix.nnz} owned entries)")
+    # Names live only in the appid -> name dimension table; analysis files are keyed by appid
+    names = {g.get('appid'): g.get('name') for sid in steamids for g in user_games[sid]}
+    names[appid] = game_display_name
+    # The parquet artifact keeps every owned entry; only the Excel view is cut to the top games
+    top_appids = matrix.top_appids(EXCEL_TOP_GAMES)
+    if len(top_appids) == 0:
+        print(f"No nonzero columns for '{game_display_name}', skipping export.")
+        return names
+    df_games = matrix.to_wide_hours(top_appids)
+    kpis = dict(kpis, sample_size=len(steamids))
+    # SteamSpy can miss or return an empty record; the merge keys KPI rows by appid
+    if kpis.get('appid') is None:
+        kpis['appid'] = appid
+    if not kpis.get('name'):
+        kpis['name'] = game_display_name
+    df_kpi = pd.DataFrame([kpis])
+    # Robust filename sanitization
+    safe_name = re.sub(r'[^A-Za-z0-9_]+', '_', str(game_display_name)).strip('_')
+    if not safe_name:
+        print(f"Invalid or empty game_display_name for appid {appid}, skipping export.")
+        return names
+    outfile = os.path.join(OUTPUT_FOLDER, f"{safe_name}_analysis.parquet")
+    try:
+        with pd.ExcelWriter(outfile.replace('.parquet', '.xlsx')) as writer:
+            df_games.to_excel(writer, sheet_name='Other Games', index=False)
+            df_kpi.to_excel(writer, sheet_name='KPIs', index=False)
+        matrix.to_long().to_parquet(outfile, index=False)
+        df_kpi.to_parquet(outfile.replace('_analysis.parquet', KPI_SUFFIX), index=False)
+        print(f"Exported other games and KPIs to {outfile}")
+    except Exception as e:
+        print(f"Failed to export data for '{game_display_name}' (filename: {outfile}): {e}")
+    return names
+
+def rebuild_from_landing_zone():
+    """Regenerate every analysis file from stored samples and owned-games responses, offline"""
+    games_store = OwnedGamesStore(ttl_days=OWNED_GAMES_TTL_DAYS)
+    samples = games_store.latest_samples()
+    if not samples:
+        print("No samples recorded in the landing zone, nothing to rebuild.")
+        return
+    for appid, sample in samples.items():
+        user_games = {}
+        for sid in sample['steamids']:
+            glist = games_store.get(sid, ignore_ttl=True)
+            if glist is not None:
+                user_games[sid] = glist
+        steamids = [sid for sid in sample['steamids'] if sid in user_games]
+        print(f"Rebuilding '{sample['name']}' from {len(steamids)} stored owned-games lists...")
+        names = export_analysis(appid, sample['name'], sample.get('kpis') or {}, steamids, user_games)
+        app_names.update_app_names(names)
+
+def collect_game(game_name, api_key, app_list, name_index, visibility_store, games_store):
+    """Collect reviews, a public-profile sample and the analysis files for one target game.
+
+    Returns the {appid: name} pairs for the app_names dimension table.
+    """
+    print(f"Processing '{game_name}'...")
+    if str(game_name).isdigit():
+        appid = int(game_name)
+        kpis = steamspy.fetch_kpis(appid)
+        game_display_name = kpis.get('name')
+        if not game_display_name:
+            game_display_name = app_list.appid_to_name.get(appid, str(game_name))
+    else:
+        appid = app_index.find_appid(name_index, game_name)
+        kpis = steamspy.fetch_kpis(appid) if appid else {}
+        game_display_name = kpis.get('name', game_name)
+    if not appid:
+        print(f"AppID not found for '{game_name}', skipping.")
         return {}
-    data = resp.json()
-    keys = ['appid', 'name', 'developer', 'publisher', 'score_rank',
-            'owners', 'average_forever', 'average_2weeks',
-            'median_forever', 'median_2weeks', 'ccu',
-            'price', 'initialprice', 'discount']
-    return {k: data.get(k) for k in keys}
+    # --- Fetch review text, alongside the public-profile sample ---
+    text_pool = ThreadPoolExecutor(max_workers=1)
+    text_job = text_pool.submit(steam_reviews.sync_reviews, appid, REVIEWS_FOLDER, REVIEWS_PER_GAME,
+                                game_display_name, INCREMENTAL_REVIEWS)
+    try:
+        print(f"Sampling public reviewers of '{game_display_name}'...")
+        steamids, user_games = sample_public_owners(api_key, appid, game_display_name, visibility_store, games_store)
+        if steamids:
+            games_store.record_sample(appid, game_display_name, kpis, steamids)
+            names = export_analysis(appid, game_display_name, kpis, steamids, user_games)
+        else:
+            print(f"No public users found for '{game_display_name}', skipping export.")
+            names = {}
+    except BaseException:
+        # Surface the sampling error now rather than after the whole review download
+        text_pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    text_pool.shutdown(wait=True)
+    try:
+        text_job.result()
+    except Exception as e:
+        print(f"Review text download failed for '{game_display_name}': {e}")
+    return names
+
+def collect_game_worker(api_key, game_name):
+    """Process-pool entry point: one target game with this process's own stores"""
+    app_list = app_list_cache.load_app_list()
+    visibility_store = steam_profiles.VisibilityStore(ttl_days=VISIBILITY_TTL_DAYS)
+    games_store = OwnedGamesStore(ttl_days=OWNED_GAMES_TTL_DAYS)
+    try:
+        return collect_game(game_name, api_key, app_list, app_list.name_index, visibility_store, games_store)
+    finally:
+        visibility_store.report()
+        visibility_store.close()
 
-def main():
+def main(workers=1):
     load_dotenv(find_dotenv(), override=True)
     api_key = os.getenv('STEAM_API_KEY', '').strip()
     if not api_key:
         raise RuntimeError('STEAM_API_KEY missing in .env')
-    apps_map = load_app_list()
-    now = datetime.now()
-    initial_months = 6
-    max_attempts = 5
+    # Warm the AppList cache and the name index once so worker processes only read them from disk
+    app_list = app_list_cache.load_app_list()
+    name_index = app_list.name_index
+    if workers > 1 and len(GAME_NAMES) > 1:
+        # Workers share one SQLite rate limiter per host, so together they stay within the API quotas;
+        # only this process writes the app_names table
+        with ProcessPoolExecutor(max_workers=workers, initializer=steam_http.use_shared_rate_limiter) as pool:
+            futures = {pool.submit(collect_game_worker, api_key, game_name): game_name for game_name in GAME_NAMES}
+            for future in as_completed(futures):
+                try:
+                    app_names.update_app_names(future.result())
+                except Exception as e:
+                    print(f"Collection failed for '{futures[future]}': {e}")
+        return
+    visibility_store = steam_profiles.VisibilityStore(ttl_days=VISIBILITY_TTL_DAYS)
+    games_store = OwnedGamesStore(ttl_days=OWNED_GAMES_TTL_DAYS)
     for game_name in GAME_NAMES:
-        print(f"Processing '{game_name}'...")
-        if str(game_name).isdigit():
-            appid = int(game_name)
-            kpis = fetch_kpis_spy(appid)
-            game_display_name = kpis.get('name')
-            if not game_display_name:
-                appid_to_name = {v: k for k, v in apps_map.items()}
-                game_display_name = appid_to_name.get(appid, str(game_name))
-        else:
-            appid = find_appid(apps_map, game_name)
-            kpis = fetch_kpis_spy(appid) if appid else {}
-            game_display_name = kpis.get('name', game_name)
-        if not appid:
-            print(f"AppID not found for '{game_name}', skipping.")
-            continue
-        # --- Fetch review text ---
-        fetch_reviews_text(appid, REVIEWS_PER_GAME, REVIEWS_FOLDER, game_display_name)
-        # --- Fetch other owned games sample (as before) ---
-        print(f"Fetching KPIs for '{game_display_name}'...")
-        attempts = 0
-        steamids_set = set()
-        months_back = initial_months
-        language_priority = [LANGUAGE, "all"]
-        lang_idx = 0
-        while attempts < max_attempts and len(steamids_set) < SAMPLE_SIZE:
-            end_date = now
-            start_date = now - timedelta(days=months_back * 30)
-            current_language = language_priority[lang_idx]
-            print(f"Trying reviews from {start_date.date()} to {end_date.date()} (attempt {attempts+1}, language: {current_language})")
-            reviews = get_reviews(appid, MARKET, current_language, 100, start_date, end_date, min(SAMPLE_SIZE * 2, 2000))
-            print(f"Fetched {len(reviews)} reviews for '{game_name}' in date range (language: {current_language}).")
-            candidate_steamids = []
-            seen = set()
-            for rev in reviews:
-                sid = rev.get('author', {}).get('steamid')
-                if sid and sid not in seen and sid not in steamids_set:
-                    candidate_steamids.append(sid)
-                    seen.add(sid)
-            for sid in candidate_steamids:
-                if is_profile_public(api_key, sid):
-                    steamids_set.add(sid)
-                if len(steamids_set) >= SAMPLE_SIZE:
-                    break
-            print(f"Accumulated {len(steamids_set)} unique public users (attempt {attempts+1}, language: {current_language})")
-            if len(steamids_set) >= min(500, SAMPLE_SIZE):
-                break
-            attempts += 1
-            months_back += initial_months
-            # If we've tried all months and not enough, try next language priority
-            if attempts >= max_attempts and lang_idx + 1 < len(language_priority) and len(steamids_set) < SAMPLE_SIZE:
-                print(f"Not enough public profiles found with language '{current_language}'. Expanding to next language priority...")
-                lang_idx += 1
-                attempts = 0
-                months_back = initial_months
-        steamids = list(steamids_set)[:SAMPLE_SIZE]
-        if not steamids:
-            print(f"No public users found for '{game_display_name}', skipping export.")
-            continue
-        needed = set()
-        user_games = {}
-        for sid in steamids:
-            glist = get_owned_games(api_key, sid)
-            user_games[sid] = glist
-            for g in glist:
-                needed.add(g.get('name'))
-        print(f"Total unique 'other games' encountered: {len(needed)}")
-        rows = []
-        for sid in steamids:
-            glist = user_games[sid]
-            row = {'steamid': sid}
-            for g in glist:
-                name = g.get('name')
-                hrs = g.get('playtime_hours', g.get('playtime_forever', 0) / 60)
-                row[name] = hrs
-            rows.append(row)
-        if not rows or len(needed) == 0:
-            print(f"No 'other games' data for '{game_display_name}', skipping export.")
-            continue
-        df_games = pd.DataFrame(rows).fillna(0)
-        nonzero_cols = ['steamid'] + [col for col in df_games.columns if col != 'steamid' and df_games[col].sum() > 0]
-        if not set(nonzero_cols).issubset(set(df_games.columns)):
-            print(f"No nonzero columns for '{game_display_name}', skipping export.")
-            continue
-        df_games = df_games[nonzero_cols]
-        if len(df_games.columns) > 1001:
-            playtime_sums = df_games.drop(columns=['steamid']).sum().sort_values(ascending=False)
-            top_games = list(playtime_sums.head(1000).index)
-            keep_cols = ['steamid'] + top_games
-            df_games = df_games[keep_cols]
-        kpis['sample_size'] = len(steamids)
-        df_kpi = pd.DataFrame([kpis])
-        # Robust filename sanitization
-        import re
-        safe_name = re.sub(r'[^A-Za-z0-9_]+', '_', str(game_display_name)).strip('_')
-        if not safe_name:
-            print(f"Invalid or empty game_display_name for appid {appid}, skipping export.")
-            continue
-        outfile = os.path.join(OUTPUT_FOLDER, f"{safe_name}_analysis.parquet")
-        try:
-            with pd.ExcelWriter(outfile.replace('.parquet', '.xlsx')) as writer:
-                df_games.to_excel(writer, sheet_name='Other Games', index=False)
-                df_kpi.to_excel(writer, sheet_name='KPIs', index=False)
-            df_games.to_parquet(outfile, index=False)
-            print(f"Exported other games and KPIs to {outfile}")
-        except Exception as e:
-            print(f"Failed to export data for '{game_display_name}' (filename: {outfile}): {e}")
+        names = collect_game(game_name, api_key, app_list, name_index, visibility_store, games_store)
+        app_names.update_app_names(names)
+    visibility_store.report()
+    visibility_store.close()
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rebuild', action='store_true',
+                        help="rebuild every *_analysis file from the owned-games landing zone without network access")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="collect this many target games in parallel processes sharing one rate limiter")
+    args = parser.parse_args()
+    if args.rebuild:
+        rebuild_from_landing_zone()
+    else:
+        main(args.workers)
@@ -1,99 +1,65 @@
-import requests
-import pandas as pd
-import time
-import json
+import pyarrow.parquet as pq
+import glob
 import os
 from datetime import datetime
+import requests
+import steam_http
+import steamspy
+import steamspy_history
 
 STEAMSPY_ALL_API = "https://steamspy.com/api.php?request=all"
-STEAMSPY_APPDETAILS_API = "https://steamspy.com/api.php?request=appdetails&appid={appid}"
 DATE_STR = datetime.now().strftime("%Y-%m-%d")
 OUTPUT_CSV = f"steamspy_full_db_{DATE_STR}.csv"
 OUTPUT_PARQUET = f"steamspy_full_db_{DATE_STR}.parquet"
-DETAILS_CACHE = f"steamspy_full_details_cache_{DATE_STR}.json"
+WRITE_DAILY_PARQUET = False  # full per-day file; history lives in steamspy_history/ either way
+WRITE_CSV = False  # the CSV copy joins tags/languages into strings; parquet keeps them as lists
+DETAILS_MAX_AGE_DAYS = 7  # refetch appdetails older than this; newer ones are reused from earlier runs
+LEGACY_DETAILS_CACHES = "steamspy_full_details_cache_*.json"  # old per-day JSON caches, imported once
 LOG_FILE = "steamspy_db_update_log.txt"
-RATE_LIMIT_SECONDS = 1.2
+# Request spacing and retries come from steam_http.HOST_RATE_LIMITS["steamspy.com"]
 
 # 1. Download all games summary from SteamSpy
 print("Fetching all games summary from SteamSpy...")
-resp = requests.get(STEAMSPY_ALL_API)
+resp = steam_http.get(STEAMSPY_ALL_API, timeout=120)
 resp.raise_for_status()
 all_games = resp.json()
 print(f"Fetched {len(all_games)} games.")
 
-# 2. Convert to DataFrame
-rows = []
-for appid, data in all_games.items():
-    row = data.copy()
-    row['appid'] = int(appid)
-    rows.append(row)
-df = pd.DataFrame(rows)
+# 2. Optionally, fetch details for each game (genres, tags, release date)
+#    This is slow, so responses go to a persistent store, one committed row per app.
+store = steamspy.AppDetailsStore()
+if len(store) == 0:
+    for path in sorted(glob.glob(LEGACY_DETAILS_CACHES)):
+        seeded = store.import_json(path, os.path.getmtime(path))
+        print(f"Seeded {seeded} details from {path}")
 
-# 3. Optionally, fetch details for each game (genres, tags, release date)
-#    This is slow, so we cache results.
-if os.path.exists(DETAILS_CACHE):
-    with open(DETAILS_CACHE, "r", encoding="utf-8") as f:
-        details_cache = json.load(f)
-else:
-    details_cache = {}
-
-details_needed = [str(appid) for appid in df['appid'] if str(appid) not in details_cache]
+details_needed = store.stale([int(appid) for appid in all_games], DETAILS_MAX_AGE_DAYS)
 print(f"Need to fetch details for {len(details_needed)} games...")
 
 for i, appid in enumerate(details_needed):
-    for attempt in range(3):
-        try:
-            resp = requests.get(STEAMSPY_APPDETAILS_API.format(appid=appid), timeout=10)
-            if resp.status_code == 200:
-                details_cache[appid] = resp.json()
-                break
-        except Exception as e:
-            print(f"Error fetching details for {appid}: {e}")
-        time.sleep(RATE_LIMIT_SECONDS)
-    else:
-        details_cache[appid] = {}
+    try:
+        store.put(appid, steamspy.fetch_appdetails(appid))
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # Not stored, so the next run retries it instead of keeping a hole
+        print(f"Error fetching details for {appid}: {e}")
     if (i+1) % 100 == 0:
         print(f"Fetched {i+1}/{len(details_needed)} details...")
-        with open(DETAILS_CACHE, "w", encoding="utf-8") as f:
-            json.dump(details_cache, f, ensure_ascii=False, indent=2)
-    time.sleep(RATE_LIMIT_SECONDS)
-
-# Save cache at end
-with open(DETAILS_CACHE, "w", encoding="utf-8") as f:
-    json.dump(details_cache, f, ensure_ascii=False, indent=2)
-
-# 4. Merge details into main DataFrame
-#    We'll add columns: genre, tags, release_date
-
-def get_detail(appid, key):
-    d = details_cache.get(str(appid), {})
-    if key == 'tags':
-        return list(d.get('tags', {}).keys()) if d.get('tags') else []
-    if key == 'languages':
-        return d.get('languages', '').split(', ') if d.get('languages') else []
-    return d.get(key, None)
-
-# Add more fields from appdetails
-extra_fields = [
-    'developer', 'publisher', 'languages', 'score_rank', 'positive', 'negative',
-    'userscore', 'owners', 'average_forever', 'average_2weeks', 'median_forever',
-    'median_2weeks', 'ccu', 'price', 'initialprice', 'discount', 'release_date',
-    'genre', 'tags'
-]
 
-for field in extra_fields:
-    if field in ['genre', 'tags', 'release_date', 'languages']:
-        # Already handled or special handling
-        continue
-    df[field] = df['appid'].apply(lambda x: get_detail(x, field))
+details_cache = store.load()
+store.close()
 
-df['genre'] = df['appid'].apply(lambda x: get_detail(x, 'genre'))
-df['tags'] = df['appid'].apply(lambda x: get_detail(x, 'tags'))
-df['release_date'] = df['appid'].apply(lambda x: get_detail(x, 'release_date'))
-df['languages'] = df['appid'].apply(lambda x: get_detail(x, 'languages'))
+# 3. Merge details into the summary in one vectorized pass
+#    tags and languages become list columns, numeric fields are typed
+table = steamspy.snapshot_table(all_games, details_cache)
+print(f"Assembled {table.num_rows} rows x {table.num_columns} columns")
 
-# 5. Save to CSV and Parquet
-print(f"Saving to {OUTPUT_CSV} and {OUTPUT_PARQUET}...")
-df.to_csv(OUTPUT_CSV, index=False)
-df.to_parquet(OUTPUT_PARQUET, index=False)
+# 4. Record the day in the snapshot history (base table + changed rows only),
+#    and optionally write full Parquet/CSV copies
+steamspy_history.SnapshotHistory().append(table, DATE_STR)
+if WRITE_DAILY_PARQUET:
+    pq.write_table(table, OUTPUT_PARQUET, compression='zstd')
+    print(f"Also wrote {OUTPUT_PARQUET}")
+if WRITE_CSV:
+    steamspy.snapshot_csv_frame(table).to_csv(OUTPUT_CSV, index=False)
+    print(f"Also wrote {OUTPUT_CSV}")
 print("Done.")
@@ -0,0 +1,201 @@
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import app_names
+import steamspy
+
+# === Configuration Parameters ===
+GAME_METADATA_FILE = "game_metadata.parquet"  # appid -> name, genre ids, tag ids
+TAGS_GENRES_FILE = "game_tags_and_genres.json"  # name-keyed dashboard metadata
+METADATA_CACHE_FILE = "metadata_cache.json"  # appid-keyed, from metadata_cache_builder.py
+DETAILS_DB = steamspy.DETAILS_DB  # appdetails from fetch_steamspy_full_db.py
+
+
+def collect_records(names=None, tags_genres_path=TAGS_GENRES_FILE, cache_path=METADATA_CACHE_FILE,
+                    details_db=DETAILS_DB):
+    """{appid: {'genres': [...], 'tags': [...]}} from every metadata source.
+
+    Later sources win: SteamSpy appdetails, then metadata_cache.json, then
+    game_tags_and_genres.json. Names in the JSON file also fill appids from
+    names (legacy surrogate ids, entries whose stored appid was matched
+    fuzzily and points at another game).
+    """
+    records = {}
+    if os.path.exists(details_db):
+        store = steamspy.AppDetailsStore(details_db)
+        for aid, details in store.load().items():
+            tags = details.get('tags')
+            tags = list(tags) if isinstance(tags, dict) else []
+            genres = steamspy.parse_genres(details)
+            if tags or genres:
+                records[aid] = {'genres': genres, 'tags': tags[:steamspy.MAX_TAGS]}
+        store.close()
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f:
+            for aid, meta in json.load(f).items():
+                if meta.get('genres') or meta.get('tags'):
+                    records[int(aid)] = {'genres': meta.get('genres', []), 'tags': meta.get('tags', [])}
+    if os.path.exists(tags_genres_path):
+        with open(tags_genres_path, encoding='utf-8') as f:
+            tags_by_name = json.load(f)
+        claimed = set()
+        for name, info in tags_by_name.items():
+            if info.get('appid') is not None and int(info['appid']) not in claimed:
+                claimed.add(int(info['appid']))
+                records[int(info['appid'])] = {'genres': info.get('genres', []), 'tags': info.get('tags', [])}
+        for aid, name in (names or {}).items():
+            if name in tags_by_name:
+                info = tags_by_name[name]
+                records[int(aid)] = {'genres': info.get('genres', []), 'tags': info.get('tags', [])}
+    return records
+
+
+def intern(lists):
+    """Vocabulary plus CSR (offsets, ids) arrays for a list of label lists"""
+    vocab = sorted({label for labels in lists for label in labels})
+    ids = {label: i for i, label in enumerate(vocab)}
+    offsets = np.zeros(len(lists) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(labels) for labels in lists])
+    values = np.fromiter((ids[label] for labels in lists for label in labels), dtype=np.int16, count=offsets[-1])
+    return vocab, offsets, values
+
+
+def list_column(column):
+    """(offsets, values) numpy arrays of an Arrow list column, rebased to start at 0"""
+    arr = column.combine_chunks()
+    offsets = arr.offsets.to_numpy()
+    values = arr.values.to_numpy()[offsets[0]:offsets[-1]]
+    return (offsets - offsets[0]).astype(np.int32), values.astype(np.int16)
+
+
+class GameMetadata:
+    """Genres and tags per appid as interned integer ids in CSR arrays.
+
+    Rows are sorted by appid; genre_ids[genre_offsets[i]:genre_offsets[i+1]]
+    are the genres of appids[i] (tags likewise, in their original order).
+    """
+
+    def __init__(self, appids, names, genre_vocab, genre_offsets, genre_ids, tag_vocab, tag_offsets, tag_ids):
+        self.appids = appids
+        self.names = names
+        self.genre_vocab = genre_vocab
+        self.genre_offsets = genre_offsets
+        self.genre_ids = genre_ids
+        self.tag_vocab = tag_vocab
+        self.tag_offsets = tag_offsets
+        self.tag_ids = tag_ids
+
+    @classmethod
+    def from_records(cls, records, names=None):
+        appids = np.array(sorted(records), dtype=np.int64)
+        genre_vocab, genre_offsets, genre_ids = intern([records[a]['genres'] for a in appids.tolist()])
+        tag_vocab, tag_offsets, tag_ids = intern([records[a]['tags'] for a in appids.tolist()])
+        row_names = [(names or {}).get(a) for a in appids.tolist()]
+        return cls(appids, row_names, genre_vocab, genre_offsets, genre_ids, tag_vocab, tag_offsets, tag_ids)
+
+    @classmethod
+    def read_parquet(cls, path=GAME_METADATA_FILE):
+        table = pq.read_table(path)
+        meta = table.schema.metadata or {}
+        genre_offsets, genre_ids = list_column(table.column('genre_ids'))
+        tag_offsets, tag_ids = list_column(table.column('tag_ids'))
+        return cls(table.column('appid').to_numpy(), table.column('name').to_pylist(),
+                   json.loads(meta[b'genres']), genre_offsets, genre_ids,
+                   json.loads(meta[b'tags']), tag_offsets, tag_ids)
+
+    def save(self, path=GAME_METADATA_FILE):
+        genre_col = pa.ListArray.from_arrays(pa.array(self.genre_offsets, pa.int32()), pa.array(self.genre_ids, pa.int16()))
+        tag_col = pa.ListArray.from_arrays(pa.array(self.tag_offsets, pa.int32()), pa.array(self.tag_ids, pa.int16()))
+        table = pa.table({
+            'appid': pa.array(self.appids, pa.int64()),
+            'name': pa.array(self.names, pa.string()),
+            'genre_ids': genre_col,
+            'tag_ids': tag_col,
+        }).replace_schema_metadata({
+            'genres': json.dumps(self.genre_vocab, ensure_ascii=False),
+            'tags': json.dumps(self.tag_vocab, ensure_ascii=False),
+        })
+        pq.write_table(table, path + ".tmp", compression='zstd')
+        os.replace(path + ".tmp", path)
+
+    def __len__(self):
+        return len(self.appids)
+
+    def rows(self, appids):
+        """Row index per appid, -1 where the appid has no metadata"""
+        appids = np.asarray(appids, dtype=np.int64)
+        if len(self.appids) == 0:
+            return np.full(len(appids), -1)
+        pos = np.minimum(np.searchsorted(self.appids, appids), len(self.appids) - 1)
+        return np.where(self.appids[pos] == appids, pos, -1)
+
+    def _labels(self, appid, vocab, offsets, ids):
+        row = self.rows([appid])[0]
+        if row < 0:
+            return []
+        return [vocab[i] for i in ids[offsets[row]:offsets[row + 1]]]
+
+    def genres(self, appid):
+        return self._labels(appid, self.genre_vocab, self.genre_offsets, self.genre_ids)
+
+    def tags(self, appid):
+        return self._labels(appid, self.tag_vocab, self.tag_offsets, self.tag_ids)
+
+    def _hours(self, appids, hours, vocab, offsets, ids):
+        rows = self.rows(appids)
+        hours = np.asarray(hours, dtype=float)
+        keep = rows >= 0
+        rows, hours = rows[keep], hours[keep]
+        starts, lengths = offsets[rows], offsets[rows + 1] - offsets[rows]
+        # Positions of every label of every selected row, in one flat array
+        flat = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        totals = np.bincount(ids[flat], weights=np.repeat(hours, lengths), minlength=len(vocab))
+        return {vocab[i]: totals[i] for i in np.flatnonzero(totals)}
+
+    def genre_hours(self, appids, hours):
+        """{genre: summed hours} over appids, each app weighted by its hours"""
+        return self._hours(appids, hours, self.genre_vocab, self.genre_offsets, self.genre_ids)
+
+    def tag_hours(self, appids, hours):
+        """{tag: summed hours} over appids, each app weighted by its hours"""
+        return self._hours(appids, hours, self.tag_vocab, self.tag_offsets, self.tag_ids)
+
+    def has_genre(self, appids, genre):
+        """Boolean mask of appids that list genre"""
+        rows = self.rows(appids)
+        if genre not in self.genre_vocab:
+            return np.zeros(len(rows), dtype=bool)
+        gid = self.genre_vocab.index(genre)
+        row_of_label = np.repeat(np.arange(len(self.appids)), np.diff(self.genre_offsets))
+        # One spare False slot at the end, which the -1 rows of unknown appids index
+        tagged = np.zeros(len(self.appids) + 1, dtype=bool)
+        tagged[row_of_label[self.genre_ids == gid]] = True
+        return tagged[rows]
+
+
+def build_game_metadata(names=None, path=GAME_METADATA_FILE):
+    """Rebuild the store from all sources; names defaults to the stored names plus app_names"""
+    if names is None:
+        names = app_names.load_app_names()
+        if os.path.exists(path):
+            stored = GameMetadata.read_parquet(path)
+            names = {**{a: n for a, n in zip(stored.appids.tolist(), stored.names) if n}, **names}
+    metadata = GameMetadata.from_records(collect_records(names), names)
+    metadata.save(path)
+    print(f"Wrote {len(metadata)} apps, {len(metadata.genre_vocab)} genres and {len(metadata.tag_vocab)} tags to {path}")
+    return metadata
+
+
+def load_game_metadata(names=None, path=GAME_METADATA_FILE):
+    """Read the store, or build it in memory from the source files if it has not been written"""
+    if os.path.exists(path):
+        return GameMetadata.read_parquet(path)
+    return GameMetadata.from_records(collect_records(names), names)
+
+
+if __name__ == '__main__':
+    build_game_metadata()
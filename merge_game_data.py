@@ -1,72 +1,312 @@
+import argparse
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import app_names
+import game_metadata
+from playtime_matrix import LONG_COLUMNS
 
 # === Configuration ===
 DATA_DIR = "game_data"
-EXCEL_SUFFIX = "_analysis.xlsx"
+PARQUET_SUFFIX = "_analysis.parquet"  # (steamid, appid, minutes) from collect_game_data_and_reviews.py
+KPI_SUFFIX = "_analysis_kpis.parquet"
+EXCEL_SUFFIX = "_analysis.xlsx"  # fallback for titles without parquet artifacts
+KPIS_FILE = "merged_all_kpis.arrow"  # merged tables as uncompressed Arrow IPC, read by shared_data.py
+OTHER_GAMES_FILE = "merged_top_other_games.arrow"  # long table, sorted by base_appid then rank
+OTHER_GAMES_COLUMNS = ['base_appid', 'other_appid', 'avg_hours', 'rank']
+APP_NAMES_FILE = "merged_app_names.arrow"
+WRITE_EXCEL = False  # also export OUTPUT_FILE and its tab-separated .txt copies
 OUTPUT_FILE = "merged_game_data.xlsx"
 TOP_N = 100  # number of top other games to include
+WORKERS = min(8, os.cpu_count() or 1)  # processes reading analysis files
+MANIFEST_FILE = "merge_manifest.json"  # input hashes, per-title aggregates and the metadata inputs of the last merge
+MANIFEST_VERSION = 1
 
 
-def discover_files(data_dir, suffix):
-    return [f for f in os.listdir(data_dir) if f.endswith(suffix)]
+def discover_analyses(data_dir):
+    """Analysis stems ('<name>_analysis') that have a parquet or xlsx artifact, sorted"""
+    stems = set()
+    for f in os.listdir(data_dir):
+        for suffix in (PARQUET_SUFFIX, EXCEL_SUFFIX):
+            if f.endswith(suffix):
+                stems.add(f[:-len(suffix)] + '_analysis')
+    return sorted(stems)
 
 
-def merge_kpis(files, suffix):
-    rows = []
-    for fname in files:
+def column_appid(col, resolver):
+    """Analysis columns are appids; older files used game names, resolved via the dimension table"""
+    if isinstance(col, int) or str(col).lstrip('-').isdigit():
+        return int(col)
+    return resolver.resolve(col)
+
+
+def read_kpis(stem):
+    """The KPI row of one analysis, from its parquet artifact or else the xlsx 'KPIs' sheet"""
+    path = os.path.join(DATA_DIR, stem[:-len('_analysis')] + KPI_SUFFIX)
+    if os.path.exists(path):
+        return pd.read_parquet(path).iloc[0].to_dict()
+    return pd.read_excel(os.path.join(DATA_DIR, stem + '.xlsx'), sheet_name='KPIs').iloc[0].to_dict()
+
+
+def read_average_hours(stem, kpis):
+    """Average hours per sampled user for every other game, keyed by column label.
+
+    Long parquet artifacts are summed per appid over the appid and minutes
+    columns only. Older parquet files are wide (steamid plus one hours column
+    per game name) and the xlsx 'Other Games' sheet is the last resort.
+    """
+    path = os.path.join(DATA_DIR, stem + '.parquet')
+    if not os.path.exists(path):
+        df = pd.read_excel(os.path.join(DATA_DIR, stem + '.xlsx'), sheet_name='Other Games')
+        return df.drop(columns=['steamid'], errors='ignore').mean()
+    columns = pq.read_schema(path).names
+    if columns == LONG_COLUMNS:
+        sample_size = kpis.get('sample_size')
+        read = ['appid', 'minutes'] if pd.notna(sample_size) else LONG_COLUMNS
+        df = pd.read_parquet(path, columns=read)
+        if pd.isna(sample_size):
+            sample_size = df['steamid'].nunique()
+        return df.groupby('appid')['minutes'].sum() / 60 / max(int(sample_size), 1)
+    return pd.read_parquet(path, columns=[c for c in columns if c != 'steamid']).mean()
+
+
+def read_analysis(stem):
+    """Worker: (stem, KPI row, average hours per column label) for one analysis"""
+    kpis = read_kpis(stem)
+    return stem, kpis, read_average_hours(stem, kpis)
+
+
+def load_analyses(stems, workers=WORKERS):
+    """read_analysis for every stem, in order, across a process pool"""
+    if workers <= 1 or len(stems) <= 1:
+        return [read_analysis(stem) for stem in stems]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_analysis, stems))
+
+
+def file_signature(path, previous=None):
+    """{'size', 'mtime', 'sha256'} of a file; the hash is reused while size and mtime match"""
+    stat = os.stat(path)
+    if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime:
+        return previous
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest.hexdigest()}
+
+
+def input_signatures(stem, previous=None):
+    """Signatures of every artifact of one analysis, keyed by file name"""
+    base = stem[:-len('_analysis')]
+    files = {}
+    for fname in (stem + '.parquet', base + KPI_SUFFIX, stem + '.xlsx'):
         path = os.path.join(DATA_DIR, fname)
-        df = pd.read_excel(path, sheet_name='KPIs')
-        row = df.iloc[0].to_dict()
-        base = fname.replace(suffix, '').replace('_', ' ')
-        row['base_game'] = base
+        if os.path.exists(path):
+            files[fname] = file_signature(path, (previous or {}).get(fname))
+    return files
+
+
+def content_hashes(files):
+    return {fname: sig['sha256'] for fname, sig in files.items()}
+
+
+def metadata_signature(names):
+    """Hash of the merged appids and names plus the size and mtime of every game_metadata source"""
+    digest = hashlib.sha256()
+    for appid, name in sorted((int(a), str(n)) for a, n in names.items()):
+        digest.update(f"{appid}\t{name}\n".encode('utf-8'))
+    details = game_metadata.DETAILS_DB
+    for path in (game_metadata.TAGS_GENRES_FILE, game_metadata.METADATA_CACHE_FILE, details, details + '-wal'):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{path}\t{stat.st_size}\t{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def json_value(value):
+    """KPI cells as JSON values: numpy scalars become Python numbers, missing values None"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+
+def load_manifest(path=MANIFEST_FILE):
+    """The last merge's manifest ('analyses': {stem: entry}, 'metadata'), or {} if made with other settings"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('top_n') != TOP_N:
+        return {}
+    return manifest
+
+
+def save_manifest(entries, metadata=None, path=MANIFEST_FILE):
+    manifest = {'version': MANIFEST_VERSION, 'top_n': TOP_N, 'analyses': entries, 'metadata': metadata}
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def manifest_entry(files, kpis, avg, top_n):
+    """Aggregates kept for an unchanged title: its KPI row and average hours.
+
+    Appid-keyed averages are cut to the top_n here. Legacy name-keyed ones
+    are kept whole, since names resolved on a later run may still collapse
+    onto one appid.
+    """
+    if all(isinstance(c, (int, np.integer)) for c in avg.index):
+        avg = avg.sort_values(ascending=False).head(top_n)
+    return {
+        'files': files,
+        'kpis': {k: json_value(v) for k, v in kpis.items()},
+        'avg_hours': [[json_value(c), float(v)] for c, v in avg.items()],
+    }
+
+
+def load_analyses_incremental(stems, manifest, workers=WORKERS):
+    """(stem, KPI row, average hours) per stem, reading only titles whose inputs changed.
+
+    Returns the analyses and the updated manifest; titles no longer on disk drop out.
+    """
+    entries, changed = {}, []
+    for stem in stems:
+        previous = manifest.get(stem)
+        files = input_signatures(stem, previous and previous['files'])
+        if previous and content_hashes(previous['files']) == content_hashes(files):
+            entries[stem] = dict(previous, files=files)
+        else:
+            entries[stem] = {'files': files}
+            changed.append(stem)
+    print(f"{len(changed)} new or changed analyses, {len(stems) - len(changed)} reused from {MANIFEST_FILE}")
+    for stem, kpis, avg in load_analyses(changed, workers):
+        entries[stem] = manifest_entry(entries[stem]['files'], kpis, avg, TOP_N)
+    analyses = []
+    for stem in stems:
+        avg = entries[stem]['avg_hours']
+        analyses.append((stem, entries[stem]['kpis'],
+                         pd.Series([v for _, v in avg], index=[c for c, _ in avg], dtype=float)))
+    return analyses, entries
+
+
+def merge_kpis(analyses, resolver):
+    rows = []
+    for stem, kpis, _ in analyses:
+        row = dict(kpis)
+        base = stem[:-len('_analysis')].replace('_', ' ')
+        if pd.notna(row.get('appid')):
+            row['base_appid'] = int(row['appid'])
+        else:
+            row['base_appid'] = resolver.resolve(base)
+        if pd.isna(row.get('name')):
+            row['name'] = base
+        row['analysis_file'] = stem
         rows.append(row)
     kpi_df = pd.DataFrame(rows)
-    cols = ['base_game'] + [c for c in kpi_df.columns if c != 'base_game']
+    cols = ['base_appid'] + [c for c in kpi_df.columns if c != 'base_appid']
     return kpi_df[cols]
 
 
-def merge_other_games(files, top_n, suffix):
-    rows = []
-    for fname in files:
-        path = os.path.join(DATA_DIR, fname)
-        df = pd.read_excel(path, sheet_name='Other Games')
-        base = fname.replace(suffix, '').replace('_', ' ')
-        if 'steamid' in df.columns:
-            df = df.drop(columns=['steamid'])
-        avg = df.mean().sort_values(ascending=False).head(top_n)
-        row = {'base_game': base}
-        row.update(avg.to_dict())
-        rows.append(row)
-    other_df = pd.DataFrame(rows).fillna(0)
-    cols = ['base_game'] + [c for c in other_df.columns if c != 'base_game']
-    return other_df[cols]
+def merge_other_games(analyses, top_n, resolver, base_appids):
+    """Long (base_appid, other_appid, avg_hours, rank) table, sorted by base game then rank"""
+    frames = []
+    for stem, _, avg in analyses:
+        avg = avg.copy()
+        avg.index = [column_appid(c, resolver) for c in avg.index]
+        # Legacy name columns can collapse onto one appid
+        avg = avg.groupby(level=0).sum().sort_values(ascending=False).head(top_n)
+        frames.append(pd.DataFrame({
+            'base_appid': np.full(len(avg), base_appids[stem], dtype=np.int64),
+            'other_appid': avg.index.to_numpy(dtype=np.int64),
+            'avg_hours': avg.to_numpy(dtype=float),
+            'rank': np.arange(1, len(avg) + 1, dtype=np.int32),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=OTHER_GAMES_COLUMNS)
+    other_df = pd.concat(frames, ignore_index=True)
+    return other_df.sort_values(['base_appid', 'rank'], kind='stable').reset_index(drop=True)
+
+
+def build_app_names(kpi_df, other_df, resolver):
+    """appid -> name dimension for every appid referenced by the merged tables"""
+    names = dict(resolver.resolved)
+    names.update(app_names.load_app_names())
+    names.update(zip(kpi_df['base_appid'], kpi_df['name']))
+    appids = set(kpi_df['base_appid']) | set(other_df['other_appid'])
+    rows = [{'appid': aid, 'name': names.get(aid, str(aid))} for aid in sorted(appids)]
+    return pd.DataFrame(rows, columns=['appid', 'name'])
 
 
-def main():
-    files = discover_files(DATA_DIR, EXCEL_SUFFIX)
-    if not files:
-        print(f"No '*{EXCEL_SUFFIX}' files found in {DATA_DIR}")
+def write_arrow(df, path):
+    """Write df as an uncompressed Arrow IPC file, so readers load it without decoding"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path + '.tmp', 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(path + '.tmp', path)
+
+
+def main(full=False, write_excel=WRITE_EXCEL):
+    stems = discover_analyses(DATA_DIR)
+    if not stems:
+        print(f"No '*{PARQUET_SUFFIX}' or '*{EXCEL_SUFFIX}' files found in {DATA_DIR}")
         return
 
-    print(f"Merging {len(files)} analysis files...")
-    kpi_df = merge_kpis(files, EXCEL_SUFFIX)
-    other_df = merge_other_games(files, TOP_N, EXCEL_SUFFIX)
+    print(f"Merging {len(stems)} analysis files...")
+    previous = {} if full else load_manifest()
+    analyses, manifest = load_analyses_incremental(stems, previous.get('analyses', {}))
+    resolver = app_names.LegacyNameResolver()
+    kpi_df = merge_kpis(analyses, resolver)
+    base_appids = dict(zip(kpi_df['analysis_file'], kpi_df['base_appid']))
+    other_df = merge_other_games(analyses, TOP_N, resolver, base_appids)
+    names_df = build_app_names(kpi_df, other_df, resolver)
+    if resolver.unresolved:
+        print(f"{resolver.unresolved} legacy game-name columns had no known appid and use surrogate ids")
+
+    for df, path in ((kpi_df, KPIS_FILE), (other_df, OTHER_GAMES_FILE), (names_df, APP_NAMES_FILE)):
+        write_arrow(df, path)
+    print(f"Wrote merged tables to {KPIS_FILE}, {OTHER_GAMES_FILE} and {APP_NAMES_FILE}")
+
+    if write_excel:
+        print(f"Writing merged output to {OUTPUT_FILE}")
+        with pd.ExcelWriter(OUTPUT_FILE) as writer:
+            kpi_df.to_excel(writer, sheet_name='All KPIs', index=False)
+            other_df.to_excel(writer, sheet_name='Top Other Games', index=False)
+            names_df.to_excel(writer, sheet_name='App Names', index=False)
+
+        # Export txt versions (tab-separated)
+        kpi_txt = OUTPUT_FILE.replace('.xlsx', '_all_kpis.txt')
+        other_txt = OUTPUT_FILE.replace('.xlsx', '_top_other_games.txt')
+        kpi_df.to_csv(kpi_txt, sep='\t', index=False)
+        other_df.to_csv(other_txt, sep='\t', index=False)
+        print(f"Also wrote {kpi_txt} and {other_txt}")
 
-    print(f"Writing merged output to {OUTPUT_FILE}")
-    with pd.ExcelWriter(OUTPUT_FILE) as writer:
-        kpi_df.to_excel(writer, sheet_name='All KPIs', index=False)
-        other_df.to_excel(writer, sheet_name='Top Other Games', index=False)
+    # Genres/tags for every merged appid, including legacy surrogate ids matched by name
+    names = dict(zip(names_df['appid'], names_df['name']))
+    metadata = metadata_signature(names)
+    if metadata == previous.get('metadata') and os.path.exists(game_metadata.GAME_METADATA_FILE):
+        print(f"Merged apps and metadata sources unchanged, kept {game_metadata.GAME_METADATA_FILE}")
+    else:
+        game_metadata.build_game_metadata(names)
 
-    # Export txt versions (tab-separated)
-    kpi_txt = OUTPUT_FILE.replace('.xlsx', '_all_kpis.txt')
-    other_txt = OUTPUT_FILE.replace('.xlsx', '_top_other_games.txt')
-    kpi_df.to_csv(kpi_txt, sep='\t', index=False)
-    other_df.to_csv(other_txt, sep='\t', index=False)
-    print(f"Also wrote {kpi_txt} and {other_txt}")
+    save_manifest(manifest, metadata)
 
     print("Done.")
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--full', action='store_true',
+                        help=f"ignore {MANIFEST_FILE} and re-read every analysis file")
+    parser.add_argument('--excel', action='store_true',
+                        help=f"also write {OUTPUT_FILE} and its .txt copies")
+    args = parser.parse_args()
+    main(args.full, WRITE_EXCEL or args.excel)
@@ -1,47 +1,34 @@
 import os
-import time
 import json
+import argparse
 from dotenv import load_dotenv, find_dotenv
-import requests
+import steam_http
+import steamspy
+import game_metadata
 
 # Configuration
 CACHE_FILE = "metadata_cache.json"
 NEEDED_FILE = "needed_appids.json"
+TAGS_GENRES_FILE = "game_tags_and_genres.json"  # dashboard metadata, keyed by game name
 APPLIST_URL = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
 STORE_DETAILS_URL = "https://store.steampowered.com/api/appdetails"
-STEAMSPY_URL = "https://steamspy.com/api.php?request=appdetails&appid={}"
 
 # Load environment (if needed)
 load_dotenv(find_dotenv(), override=True)
 
 
 def fetch_app_list():
-    resp = requests.get(APPLIST_URL)
+    resp = steam_http.get(APPLIST_URL, timeout=60)
     resp.raise_for_status()
     return resp.json().get("applist", {}).get("apps", [])
 
 
-def fetch_store_genres(appid, max_retries=3, backoff_factor=2):
-    retries = 0
-    while True:
-        resp = requests.get(STORE_DETAILS_URL, params={"appids": appid})
-        if resp.status_code == 429 and retries < max_retries:
-            wait = backoff_factor ** retries
-            print(f"Rate limited fetching genres for {appid}, retrying in {wait}s")
-            time.sleep(wait)
-            retries += 1
-            continue
-        resp.raise_for_status()
-        data = resp.json().get(str(appid), {}).get("data", {})
-        return [g.get("description") for g in data.get("genres", [])]
-
-
-def fetch_spy_tags(appid):
-    resp = requests.get(STEAMSPY_URL.format(appid))
+def fetch_store_genres(appid):
+    # steam_http backs off on 429 (honouring Retry-After) before this raises
+    resp = steam_http.get(STORE_DETAILS_URL, params={"appids": appid})
     resp.raise_for_status()
-    data = resp.json()
-    tags = data.get("tags") if isinstance(data, dict) else None
-    return list(tags.keys()) if isinstance(tags, dict) else []
+    data = resp.json().get(str(appid), {}).get("data", {})
+    return [g.get("description") for g in data.get("genres", [])]
 
 
 def load_needed_appids():
@@ -64,37 +51,81 @@ def build_metadata_cache(appids_to_fetch):
     for idx, appid in enumerate(appids_to_fetch, 1):
         try:
             genres = fetch_store_genres(appid)
-            tags = fetch_spy_tags(appid)
+            tags = steamspy.fetch_tags(appid)
         except Exception as e:
             print(f"Skipping {appid} due to error: {e}")
             genres, tags = [], []
         cache[str(appid)] = {"genres": genres, "tags": tags}
         if idx % 50 == 0 or idx == total:
             print(f"Fetched metadata for {idx}/{total} apps")
-        time.sleep(0.2)
     return cache
 
 
-def main():
+def harvest_metadata_cache(appids_to_fetch):
+    """Bulk variant of build_metadata_cache using SteamSpy genre and tag listings"""
+    tags = steamspy.load_tag_vocabulary()
+    print(f"Harvesting {len(appids_to_fetch)} apps from {len(steamspy.GENRES)} genre and {len(tags)} tag listings...")
+    harvested = steamspy.harvest_tags_genres(appids_to_fetch, tags)
+    return {str(aid): meta for aid, meta in harvested.items()}
+
+
+def rebuild_tags_genres_file(cache):
+    """Refresh genres/tags of every game in game_tags_and_genres.json from the cache"""
+    if not os.path.exists(TAGS_GENRES_FILE):
+        return
+    with open(TAGS_GENRES_FILE, encoding='utf-8') as f:
+        tags_genres = json.load(f)
+    updated = 0
+    for info in tags_genres.values():
+        meta = cache.get(str(info.get('appid')))
+        if meta and (meta['genres'] or meta['tags']):
+            info['genres'], info['tags'] = meta['genres'], meta['tags']
+            updated += 1
+    with open(TAGS_GENRES_FILE + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(tags_genres, f, ensure_ascii=False, indent=2)
+    os.replace(TAGS_GENRES_FILE + '.tmp', TAGS_GENRES_FILE)
+    print(f"Rebuilt '{TAGS_GENRES_FILE}': {updated}/{len(tags_genres)} games refreshed")
+
+
+def main(bulk=False, rebuild=False):
     # Load list of needed appids (from analysis script)
     needed = load_needed_appids()
-    if needed is None:
+    if needed is None and not rebuild:
         print(f"No '{NEEDED_FILE}' found. Run analysis to generate needed appids first.")
         return
+    needed = needed or set()
     # Load existing cache
     cache = load_existing_cache()
     # Determine which appids still need fetching
-    to_fetch = [aid for aid in needed if str(aid) not in cache]
+    if rebuild:
+        # Everything is refetched, including the dashboard's games
+        with open(TAGS_GENRES_FILE, encoding='utf-8') as f:
+            dashboard_appids = {info['appid'] for info in json.load(f).values() if info.get('appid')}
+        to_fetch = sorted({int(aid) for aid in needed} | dashboard_appids)
+    else:
+        to_fetch = [aid for aid in needed if str(aid) not in cache]
     if not to_fetch:
         print("All needed app metadata already cached.")
     else:
         print(f"Fetching metadata for {len(to_fetch)} new apps...")
-        new_data = build_metadata_cache(to_fetch)
+        if bulk or rebuild:
+            new_data = harvest_metadata_cache(to_fetch)
+        else:
+            new_data = build_metadata_cache(to_fetch)
         cache.update(new_data)
         # Write updated cache
         with open(CACHE_FILE, 'w', encoding='utf-8') as f:
             json.dump(cache, f)
         print(f"Updated '{CACHE_FILE}' with {len(new_data)} entries. Total entries: {len(cache)}")
+        if rebuild:
+            rebuild_tags_genres_file(cache)
+            game_metadata.build_game_metadata()
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bulk', action='store_true',
+                        help="build genres/tags from SteamSpy genre and tag listings; per-app calls only for the rest")
+    parser.add_argument('--rebuild', action='store_true',
+                        help=f"refetch every needed app and the games in {TAGS_GENRES_FILE} (bulk), then rewrite both files")
+    args = parser.parse_args()
+    main(args.bulk, args.rebuild)
@@ -1,10 +1,15 @@
 import os
-import time
 from datetime import datetime, timedelta
 from dotenv import load_dotenv, find_dotenv
-import requests
 import pandas as pd
-import difflib
+import steam_http
+import steamspy
+import steam_profiles
+import steam_reviews
+import app_index
+import app_list_cache
+import app_names
+from owned_games_store import OwnedGamesStore
 
 # === Configuration Parameters ===
 GAME_NAMES = ["The Warlock of Firetop Mountain", "Deathtrap Dungeon Trilogy", "Curious Expedition", "Frostpunk 1886", "This War of Mine", "Rogue Hex"  ]  # List of target game names to sample
@@ -13,103 +18,14 @@ LANGUAGE = "english"
 MARKET = "us"
 SAMPLE_SIZE = 1000
 OUTPUT_FOLDER = "game_data"
-
-
-def load_app_list():
-    """Fetch full Steam AppList"""
-    resp = requests.get("https://api.steampowered.com/ISteamApps/GetAppList/v2/")
-    resp.raise_for_status()
-    apps = resp.json().get('applist', {}).get('apps', [])
-    return {app['name']: app['appid'] for app in apps}
-
-
-def find_appid(apps_map, name):
-    """Lookup AppID by exact name, substring match, or numeric ID input"""
-    # If user provided a numeric AppID, use it directly
-    if name.isdigit():
-        return int(name)
-    # Exact match
-    if name in apps_map:
-        return apps_map[name]
-    # Substring match (ignoring punctuation/spaces)
-    norm = ''.join(ch.lower() for ch in name if ch.isalnum())
-    for n, aid in apps_map.items():
-        norm_n = ''.join(ch.lower() for ch in n if ch.isalnum())
-        if norm in norm_n:
-            return aid
-    # Not found
-    print(f"'{name}' wasn't found. Try removing punctuation or inputting the AppID directly.")
-    return None
-
-
-def get_reviews(app_id, country, language, per_page, start_date, end_date, max_reviews):
-    """Paginate Steam Store reviews"""
-    start_ts = int(start_date.timestamp())
-    end_ts = int(end_date.timestamp())
-    reviews, cursor = [], "*"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    max_retries = 5
-    for attempt in range(max_retries):
-        try:
-            resp = requests.get(
-                f"https://store.steampowered.com/appreviews/{app_id}",
-                params={
-                    "json": 1,
-                    # fetch all reviews to cover full date range
-                    "filter": "all",
-                    "language": language,
-                    "purchase_type": "all",
-                    "cc": country,
-                    "num_per_page": per_page,
-                    "cursor": cursor
-                }, headers=headers
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            batch = data.get("reviews", [])
-            if not batch:
-                break
-            for r in batch:
-                ts = r.get('timestamp_created', 0)
-                if ts < start_ts:
-                    return reviews
-                if ts <= end_ts:
-                    reviews.append(r)
-                    if len(reviews) >= max_reviews:
-                        break
-            cursor = data.get('cursor', cursor)
-            time.sleep(0.2)
-        except requests.exceptions.HTTPError as e:
-            if resp.status_code >= 500 and resp.status_code < 600:
-                if attempt < max_retries - 1:
-                    print(f"Server error {resp.status_code} on attempt {attempt+1}. Retrying in 5 seconds...")
-                    time.sleep(5)
-                    continue
-            raise  # re-raise if not a server error or out of retries
-        except requests.exceptions.RequestException as e:
-            if attempt < max_retries - 1:
-                print(f"Request error on attempt {attempt+1}: {e}. Retrying in 5 seconds...")
-                time.sleep(5)
-                continue
-            raise
-    return reviews
-
-
-def is_profile_public(api_key, steam_id):
-    """Check profile visibility via GetPlayerSummaries"""
-    resp = requests.get(
-        "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
-        params={"key": api_key, "steamids": steam_id}
-    )
-    if resp.ok:
-        players = resp.json().get('response', {}).get('players', [])
-        return bool(players and players[0].get('communityvisibilitystate') == 3)
-    return False
+MAX_IN_FLIGHT = 8  # concurrent profile/owned-games requests (see steam_http.HOST_RATE_LIMITS)
+VISIBILITY_TTL_DAYS = 30  # reuse stored profile visibility checks for this long
+OWNED_GAMES_TTL_DAYS = 30  # reuse landing-zone GetOwnedGames responses for this long
 
 
 def get_owned_games(api_key, steam_id):
     """Fetch owned games (name + playtime)"""
-    resp = requests.get(
+    resp = steam_http.get(
         "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/",
         params={
             "key": api_key,
@@ -125,21 +41,6 @@ def get_owned_games(api_key, steam_id):
     return resp.json().get('response', {}).get('games', [])
 
 
-def fetch_kpis_spy(appid):
-    """Fetch KPI metrics from SteamSpy for a given appid"""
-    url = f"https://steamspy.com/api.php?request=appdetails&appid={appid}"
-    resp = requests.get(url)
-    if not resp.ok:
-        return {}
-    data = resp.json()
-    # select relevant KPIs
-    keys = ['appid', 'name', 'developer', 'publisher', 'score_rank',
-            'owners', 'average_forever', 'average_2weeks',
-            'median_forever', 'median_2weeks', 'ccu',
-            'price', 'initialprice', 'discount']
-    return {k: data.get(k) for k in keys}
-
-
 def main():
     # Load API key
     load_dotenv(find_dotenv(), override=True)
@@ -153,22 +54,24 @@ def main():
     now = datetime.now()
     initial_months = 6
     max_attempts = 5
-    apps_map = load_app_list()  # Only load once
+    app_list = app_list_cache.load_app_list()  # Cached on disk, refreshed when stale
+    name_index = app_list.name_index
+    visibility_store = steam_profiles.VisibilityStore(ttl_days=VISIBILITY_TTL_DAYS)
+    games_store = OwnedGamesStore(ttl_days=OWNED_GAMES_TTL_DAYS)
     for game_name in GAME_NAMES:
         print(f"Processing '{game_name}'...")
         # If game_name is numeric, use as appid directly
         if game_name.isdigit():
             appid = int(game_name)
-            kpis = fetch_kpis_spy(appid)
+            kpis = steamspy.fetch_kpis(appid)
             # Try to get the name from SteamSpy, then from app list, then fallback to input
             game_display_name = kpis.get('name')
             if not game_display_name:
                 # Try to get from app list
-                appid_to_name = {v: k for k, v in apps_map.items()}
-                game_display_name = appid_to_name.get(appid, game_name)
+                game_display_name = app_list.appid_to_name.get(appid, game_name)
         else:
-            appid = find_appid(apps_map, game_name)
-            kpis = fetch_kpis_spy(appid) if appid else {}
+            appid = app_index.find_appid(name_index, game_name)
+            kpis = steamspy.fetch_kpis(appid) if appid else {}
             game_display_name = kpis.get('name', game_name)
         if not appid:
             print(f"AppID not found for '{game_name}', skipping.")
@@ -180,12 +83,14 @@ def main():
         attempts = 0
         steamids_set = set()
         months_back = initial_months
+        # Cached cursor walk: widening the window only fetches pages older than those already seen
+        review_cursor = steam_reviews.ReviewCursor(appid, LANGUAGE, "recent", MARKET)
         while attempts < max_attempts and len(steamids_set) < SAMPLE_SIZE:
             end_date = now
             start_date = now - timedelta(days=months_back * 30)
             print(f"Trying reviews from {start_date.date()} to {end_date.date()} (attempt {attempts+1})")
             # Limit reviews fetched per attempt to avoid pulling too much data
-            reviews = get_reviews(appid, MARKET, LANGUAGE, 100, start_date, end_date, min(SAMPLE_SIZE * 2, 2000))
+            reviews = steam_reviews.reviews_in_window(review_cursor, start_date, end_date, min(SAMPLE_SIZE * 2, 2000))
             print(f"Fetched {len(reviews)} reviews for '{game_name}' in date range.")
             candidate_steamids = []
             seen = set()
@@ -194,11 +99,13 @@ def main():
                 if sid and sid not in seen and sid not in steamids_set:
                     candidate_steamids.append(sid)
                     seen.add(sid)
+            # Check profiles 100 steamids per request
+            public_ids = steam_profiles.resolve_public_steamids(api_key, candidate_steamids, MAX_IN_FLIGHT, store=visibility_store)
             for sid in candidate_steamids:
-                if is_profile_public(api_key, sid):
-                    steamids_set.add(sid)
                 if len(steamids_set) >= SAMPLE_SIZE:
                     break
+                if sid in public_ids:
+                    steamids_set.add(sid)
             print(f"Accumulated {len(steamids_set)} unique public users (attempt {attempts+1})")
             if len(steamids_set) >= min(500, SAMPLE_SIZE):
                 break
@@ -211,14 +118,26 @@ def main():
             print(f"No public users found for '{game_display_name}', skipping export.")
             continue
 
-        # Collect unique 'other games'
+        # Collect unique 'other games', reusing landing-zone responses within their TTL
         needed = set()
         user_games = {}
+        missing = []
         for sid in steamids:
-            glist = get_owned_games(api_key, sid)
+            glist = games_store.get(sid)
+            if glist is None:
+                missing.append(sid)
+            else:
+                user_games[sid] = glist
+        for sid, glist in steam_http.map_concurrent(lambda sid: get_owned_games(api_key, sid), missing, MAX_IN_FLIGHT):
+            games_store.put(sid, glist)
             user_games[sid] = glist
+        names = {appid: game_display_name}
+        for glist in user_games.values():
             for g in glist:
-                needed.add(g.get('name'))
+                needed.add(g.get('appid'))
+                names[g.get('appid')] = g.get('name')
+        # Columns are keyed by appid; names go to the shared appid -> name dimension table
+        app_names.update_app_names(names)
         print(f"Total unique 'other games' encountered: {len(needed)}")
 
         # Build DataFrame for other games
@@ -227,9 +146,8 @@ def main():
             glist = user_games[sid]
             row = {'steamid': sid}
             for g in glist:
-                name = g.get('name')
                 hrs = g.get('playtime_hours', g.get('playtime_forever', 0) / 60)
-                row[name] = hrs
+                row[g.get('appid')] = hrs
             rows.append(row)
         if not rows or len(needed) == 0:
             print(f"No 'other games' data for '{game_display_name}', skipping export.")
@@ -261,6 +179,8 @@ def main():
             df_games.to_excel(writer, sheet_name='Other Games', index=False)
             df_kpi.to_excel(writer, sheet_name='KPIs', index=False)
         print(f"Exported other games and KPIs to {outfile}")
+    visibility_store.report()
+    visibility_store.close()
 
 if __name__ == '__main__':
     main()
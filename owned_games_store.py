@@ -0,0 +1,116 @@
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# === Configuration Parameters ===
+LANDING_ZONE_FOLDER = "owned_games_landing"
+OWNED_GAMES_TTL_DAYS = 30  # reuse a stored GetOwnedGames response for this long
+SAMPLES_FILE = "samples.jsonl"  # which steamids were sampled for which target game
+
+
+class OwnedGamesStore:
+    """Append-only, gzip-compressed landing zone for raw GetOwnedGames responses.
+
+    Each writer appends to its own segment file, one gzip member per steamid,
+    and records (steamid, fetched_at, offset, length) in a sidecar .idx file.
+    Only the small index files are read at startup; responses are decompressed
+    on demand. The newest response per steamid wins.
+    """
+
+    def __init__(self, folder=LANDING_ZONE_FOLDER, ttl_days=OWNED_GAMES_TTL_DAYS):
+        self.folder = folder
+        self.ttl_seconds = ttl_days * 86400
+        os.makedirs(folder, exist_ok=True)
+        self.index = {}  # steamid -> (fetched_at, data_path, offset, length)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._load_index()
+
+    def _load_index(self):
+        for idx_path in sorted(glob.glob(os.path.join(self.folder, "*.idx"))):
+            data_path = idx_path[:-len(".idx")] + ".gz"
+            if not os.path.exists(data_path):
+                continue
+            size = os.path.getsize(data_path)
+            with open(idx_path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 4:
+                        continue  # partially written line from an interrupted run
+                    sid, fetched_at, offset, length = parts[0], float(parts[1]), int(parts[2]), int(parts[3])
+                    if offset + length > size:
+                        continue
+                    current = self.index.get(sid)
+                    if current is None or fetched_at >= current[0]:
+                        self.index[sid] = (fetched_at, data_path, offset, length)
+
+    def __len__(self):
+        return len(self.index)
+
+    def steamids(self):
+        return list(self.index)
+
+    def get(self, steam_id, ignore_ttl=False):
+        """Return the stored games list for steam_id, or None if missing or expired"""
+        entry = self.index.get(str(steam_id))
+        if entry is None:
+            return None
+        fetched_at, data_path, offset, length = entry
+        if not ignore_ttl and time.time() - fetched_at > self.ttl_seconds:
+            return None
+        with open(data_path, "rb") as f:
+            f.seek(offset)
+            record = json.loads(gzip.decompress(f.read(length)))
+        return record.get("games", [])
+
+    def put(self, steam_id, games):
+        """Append a freshly fetched games list for steam_id"""
+        sid = str(steam_id)
+        fetched_at = time.time()
+        payload = gzip.compress(json.dumps({"steamid": sid, "fetched_at": fetched_at, "games": games}).encode("utf-8"))
+        with self._lock:
+            if self._segment is None:
+                stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                base = os.path.join(self.folder, f"owned_games_{stamp}_{os.getpid()}")
+                self._segment = (base + ".gz", base + ".idx")
+            data_path, idx_path = self._segment
+            with open(data_path, "ab") as f:
+                offset = f.tell()
+                f.write(payload)
+            with open(idx_path, "a", encoding="utf-8") as f:
+                f.write(f"{sid}\t{fetched_at}\t{offset}\t{len(payload)}\n")
+            self.index[sid] = (fetched_at, data_path, offset, len(payload))
+
+    def record_sample(self, appid, display_name, kpis, steamids):
+        """Append which steamids were sampled for a target game (used by offline rebuilds)"""
+        record = {
+            "appid": appid,
+            "name": display_name,
+            "kpis": kpis,
+            "steamids": [str(sid) for sid in steamids],
+            "sampled_at": time.time(),
+        }
+        line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        # One unbuffered append per record, so parallel collector processes never interleave lines
+        with self._lock:
+            with open(os.path.join(self.folder, SAMPLES_FILE), "ab", buffering=0) as f:
+                f.write(line)
+
+    def latest_samples(self):
+        """Return the most recent sample record per target appid"""
+        path = os.path.join(self.folder, SAMPLES_FILE)
+        samples = {}
+        if not os.path.exists(path):
+            return samples
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                samples[record["appid"]] = record
+        return samples
@@ -3,6 +3,7 @@ from dash import html, dcc, Input, Output, dash_table
 import dash_bootstrap_components as dbc
 import plotly.express as px
 from dash_bootstrap_templates import ThemeChangerAIO, template_from_url
+import numpy as np
 import pandas as pd
 from dash import register_page, callback
 import shared_data
@@ -13,12 +14,7 @@ try:
 except ImportError:
     pass  # Not using Dash Pages anymore
 
-df_kpis_all = shared_data.df_kpis_all
-if hasattr(shared_data, 'df_other_all'):
-    df_other_all = shared_data.df_other_all
-else:
-    df_other_all = pd.DataFrame()
-TAGS_GENRES_DICT = shared_data.TAGS_GENRES_DICT
+# Each callback reads one shared_data.snapshot(), so a data reload never mixes tables mid-callback
 
 def parse_kpi_row(df_kpi):
     mapping = [
@@ -55,10 +51,9 @@ def parse_kpi_row(df_kpi):
             )
     return cards
 
-def genres_tags_cards(base_game):
-    info = TAGS_GENRES_DICT.get(base_game, {})
-    genres = info.get('genres', [])
-    tags = info.get('tags', [])
+def genres_tags_cards(base_appid, metadata):
+    genres = metadata.genres(base_appid)
+    tags = metadata.tags(base_appid)
     return [
         dbc.Card(
             dbc.CardBody([
@@ -82,8 +77,8 @@ layout = html.Div([
             dbc.Col([
                 dcc.Dropdown(
                     id='game-dropdown',
-                    options=[{'label': g, 'value': g} for g in df_kpis_all['base_game']] if not df_kpis_all.empty else [],
-                    value=df_kpis_all['base_game'].iloc[0] if not df_kpis_all.empty else None,
+                    options=[],  # filled from the current data by sync_game_dropdown_and_store
+                    value=None,
                     persistence=True,
                     style={
                         'width': '350px',
@@ -237,26 +232,23 @@ from dash.dependencies import State
 # --- Inter-page game selection sync (single callback, now local only) ---
 from dash import ctx
 @callback(
-    [Output('game-dropdown', 'value'), Output('selected-game-store', 'data')],
+    [Output('game-dropdown', 'value'), Output('selected-game-store', 'data'), Output('game-dropdown', 'options')],
     [Input('selected-game-store', 'data'), Input('game-dropdown', 'value')],
     prevent_initial_call=False
 )
 def sync_game_dropdown_and_store(store_value, dropdown_value):
     trigger = ctx.triggered_id if hasattr(ctx, 'triggered_id') else None
+    data = shared_data.snapshot()
+    options = [{'label': data.app_name(a), 'value': a} for a in data.df_kpis_all['base_appid']]
     if trigger == 'selected-game-store':
-        if store_value is not None:
-            return store_value, dash.no_update
-        elif not df_kpis_all.empty:
-            return df_kpis_all['base_game'].iloc[0], dash.no_update
+        if store_value is not None and store_value in data.base_appids:
+            return store_value, dash.no_update, options
         else:
-            return None, dash.no_update
+            return data.first_appid(), dash.no_update, options
     elif trigger == 'game-dropdown':
-        return dash.no_update, dropdown_value
+        return dash.no_update, dropdown_value, dash.no_update
     else:
-        if not df_kpis_all.empty:
-            return df_kpis_all['base_game'].iloc[0], dash.no_update
-        else:
-            return None, dash.no_update
+        return data.first_appid(), dash.no_update, options
 
 # Callbacks for Game View
 @callback(
@@ -290,13 +282,17 @@ def toggle_collapse(n, is_open):
         Input('bar-chart', 'clickData')
     ]
 )
-def update_dashboard(selected_game, theme_url, order, hide_same, genre_click, bar_click):
+def update_dashboard(selected_appid, theme_url, order, hide_same, genre_click, bar_click):
     selected_genre = None
     selected_bar_game = None
+    data = shared_data.snapshot()
+    app_name = data.app_name
+    GAME_METADATA = data.game_metadata
+    selected_game = app_name(selected_appid) if selected_appid is not None else None
     # Title for the section above bar chart and table
     players_also_played_title = f"Players of {selected_game} also played:"
-    df_kpi = df_kpis_all[df_kpis_all['base_game']==selected_game].squeeze()
-    df_other = df_other_all[df_other_all['base_game']==selected_game].squeeze()
+    df_kpi = data.kpis(selected_appid)
+    df_other = data.other_games(selected_appid)
 
     title = selected_game
     # Defensive: handle sample_size as scalar, Series, or missing
@@ -317,22 +313,24 @@ def update_dashboard(selected_game, theme_url, order, hide_same, genre_click, ba
         sample_color = 'text-success'  # green
     subtitle = html.Span(f"Sample size of public profiles: {sample_size_val:.2f}", className=sample_color)
     cards = parse_kpi_row(df_kpi)
-    genres_tags = genres_tags_cards(selected_game)
+    genres_tags = genres_tags_cards(selected_appid, GAME_METADATA)
 
-    vals = df_other.drop('base_game', errors='ignore').apply(pd.to_numeric, errors='coerce').fillna(0)
+    other_appids = df_other['other_appid'].to_numpy(dtype=np.int64)
+    other_hours = df_other['avg_hours'].to_numpy(dtype=float)
     # For bar chart: top 10
-    all_other_games_df = vals.reset_index()
-    all_other_games_df.columns = ['Game', 'AvgHours']
-    all_other_games_df['AvgHours'] = all_other_games_df['AvgHours'].round(2)
+    all_other_games_df = pd.DataFrame({
+        'AppID': other_appids,
+        'Game': [app_name(a) for a in other_appids.tolist()],
+        'AvgHours': other_hours.round(2),
+    })
 
     sorted_vals = all_other_games_df.sort_values('AvgHours', ascending=(order=='asc')).head(10)
 
     # Add genres column for hover
-    def get_genres(game):
-        info = TAGS_GENRES_DICT.get(game, {})
-        genres = info.get('genres', [])
+    def get_genres(appid):
+        genres = GAME_METADATA.genres(appid)
         return ", ".join(genres) if genres else "N/A"
-    sorted_vals['Genres'] = sorted_vals['Game'].apply(get_genres)
+    sorted_vals['Genres'] = sorted_vals['AppID'].apply(get_genres)
 
     tpl = template_from_url(theme_url) if theme_url else 'bootstrap'
     # Use default plotly colors
@@ -359,36 +357,22 @@ def update_dashboard(selected_game, theme_url, order, hide_same, genre_click, ba
     )
 
     # For table: ALL other games, paginated, searchable
-    table_data = all_other_games_df.sort_values('AvgHours', ascending=(order=='asc')).to_dict('records')
+    table_data = all_other_games_df[['Game', 'AvgHours']].sort_values('AvgHours', ascending=(order=='asc')).to_dict('records')
 
     # --- Pie chart data for genres/tags based on hours ---
-    all_other_games = [g for g in df_other.index if g != 'base_game']
     if selected_bar_game:
-        all_other_games = [selected_bar_game] if selected_bar_game in all_other_games else []
-    genre_hours = {}
-    tag_hours = {}
-    for g in all_other_games:
-        hours = pd.to_numeric(df_other.get(g, 0), errors='coerce')
-        info = TAGS_GENRES_DICT.get(g, {})
-        for genre in info.get('genres', []):
-            genre_hours[genre] = genre_hours.get(genre, 0) + hours
-        for tag in info.get('tags', []):
-            tag_hours[tag] = tag_hours.get(tag, 0) + hours
+        picked = other_appids == selected_bar_game
+        other_appids, other_hours = other_appids[picked], other_hours[picked]
+    genre_hours = GAME_METADATA.genre_hours(other_appids, other_hours)
+    tag_hours = GAME_METADATA.tag_hours(other_appids, other_hours)
 
-    filtered_games = all_other_games
     if selected_genre:
-        filtered_games = [g for g in all_other_games if selected_genre in TAGS_GENRES_DICT.get(g, {}).get('genres', [])]
-        # Recompute tag_hours for filtered games
-        tag_hours = {}
-        for g in filtered_games:
-            hours = pd.to_numeric(df_other.get(g, 0), errors='coerce')
-            info = TAGS_GENRES_DICT.get(g, {})
-            for tag in info.get('tags', []):
-                tag_hours[tag] = tag_hours.get(tag, 0) + hours
+        # Recompute tag_hours for games of the selected genre
+        in_genre = GAME_METADATA.has_genre(other_appids, selected_genre)
+        tag_hours = GAME_METADATA.tag_hours(other_appids[in_genre], other_hours[in_genre])
 
-    base_info = TAGS_GENRES_DICT.get(selected_game, {})
-    base_genres = set(base_info.get('genres', []))
-    base_tags = set(base_info.get('tags', []))
+    base_genres = set(GAME_METADATA.genres(selected_appid))
+    base_tags = set(GAME_METADATA.tags(selected_appid))
 
     # Hide genres/tags if toggled
     if 'hide' in (hide_same or []):
@@ -441,11 +425,11 @@ def update_dashboard(selected_game, theme_url, order, hide_same, genre_click, ba
     [Input('game-dropdown', 'value')],
     prevent_initial_call=False
 )
-def update_hide_same_label(selected_game):
-    if not selected_game:
+def update_hide_same_label(selected_appid):
+    if selected_appid is None:
         label = "Hide selected game genres & tags"
     else:
-        label = f"Hide {selected_game} genres & tags"
+        label = f"Hide {shared_data.snapshot().app_name(selected_appid)} genres & tags"
     return [{'label': label, 'value': 'hide'}]
 
 
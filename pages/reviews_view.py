@@ -7,32 +7,12 @@ from dash import register_page, callback
 import shared_data
 import os
 from datetime import datetime
-from shared_data import TAGS_GENRES_DICT
 from dash import callback_context
 
 register_page(__name__, path="/reviews")
 
-# Load review data for all games (CSV files in reviews_data/)
-REVIEWS_DIR = os.path.join(os.path.dirname(__file__), '..', 'reviews_data')
-
-# Map game name to appid using shared_data (assumes df_kpis_all has 'base_game' and 'appid')
-df_kpis_all = shared_data.df_kpis_all
-GAME_NAME_TO_APPID = dict(zip(df_kpis_all['base_game'], df_kpis_all['appid']))
-
-# Preload all reviews into a dict: {game: DataFrame} from Parquet files
-REVIEWS = {}
-for game, appid in GAME_NAME_TO_APPID.items():
-    pq_path = os.path.join(REVIEWS_DIR, f"reviews_{appid}.parquet")
-    if os.path.exists(pq_path):
-        df = pd.read_parquet(pq_path)
-        # Convert timestamp to datetime if needed
-        if 'timestamp' in df:
-            df['date'] = pd.to_datetime(df['timestamp'], unit='s')
-        elif 'date' not in df:
-            df['date'] = pd.NaT
-        REVIEWS[game] = df
-    else:
-        REVIEWS[game] = pd.DataFrame()
+# Reviews are read per game on first request (shared_data.reviews) and reloaded when their files change;
+# each callback reads one shared_data.snapshot() for the merged tables
 
 def parse_kpi_row(df_kpi):
     mapping = [
@@ -97,7 +77,7 @@ layout = html.Div([
             dbc.Col([
                 dcc.Dropdown(
                     id='review-game-dropdown',
-                    options=[{'label': g, 'value': g} for g in df_kpis_all['base_game']],
+                    options=[],  # filled from the current data by sync_review_dropdown_with_store
                     value=None,  # Will be set by callback from store
                     persistence=True,
                     style={
@@ -234,17 +214,17 @@ from dash_bootstrap_templates import ThemeChangerAIO, template_from_url
 
 # --- Inter-page game selection sync (read-only from store) ---
 @callback(
-    Output('review-game-dropdown', 'value'),
+    [Output('review-game-dropdown', 'value'), Output('review-game-dropdown', 'options')],
     Input('selected-game-store', 'data'),
     prevent_initial_call=False
 )
 def sync_review_dropdown_with_store(store_value):
-    if store_value is not None:
-        return store_value
-    elif not df_kpis_all.empty:
-        return df_kpis_all['base_game'].iloc[0]
+    data = shared_data.snapshot()
+    options = [{'label': data.app_name(a), 'value': a} for a in data.df_kpis_all['base_appid']]
+    if store_value is not None and store_value in data.base_appids:
+        return store_value, options
     else:
-        return None
+        return data.first_appid(), options
 
 
 # Restore genres/tags popout toggle as a separate callback (like in game_view.py)
@@ -277,13 +257,14 @@ def toggle_review_genres_tags_collapse_reviews(n, is_open):
     ],
     name="update_review_dashboard_reviews"
 )
-def update_review_dashboard_reviews(selected_game, theme_url, filter_opts):
+def update_review_dashboard_reviews(selected_appid, theme_url, filter_opts):
     ctx = callback_context
+    data = shared_data.snapshot()
+    GAME_METADATA = data.game_metadata
     # Genres & Tags popout (same as game_view)
-    def genres_tags_cards_reviews(base_game):
-        info = TAGS_GENRES_DICT.get(base_game, {})
-        genres = info.get('genres', [])
-        tags = info.get('tags', [])
+    def genres_tags_cards_reviews(base_appid):
+        genres = GAME_METADATA.genres(base_appid)
+        tags = GAME_METADATA.tags(base_appid)
         return [
             dbc.Card(
                 dbc.CardBody([
@@ -300,9 +281,9 @@ def update_review_dashboard_reviews(selected_game, theme_url, filter_opts):
                 style={'width': 'auto', 'minWidth': '8rem', 'height': '6rem', 'flex': '1 0 auto'}
             )
         ]
-    genres_tags = genres_tags_cards_reviews(selected_game)
-    df_kpi = df_kpis_all[df_kpis_all['base_game'] == selected_game].squeeze()
-    title = selected_game
+    genres_tags = genres_tags_cards_reviews(selected_appid)
+    df_kpi = data.kpis(selected_appid)
+    title = data.app_name(selected_appid) if selected_appid is not None else None
     sample_size = df_kpi.get('sample_size', 0)
     try:
         sample_size_val = int(float(sample_size))
@@ -316,16 +297,16 @@ def update_review_dashboard_reviews(selected_game, theme_url, filter_opts):
         sample_color = 'text-success'
     subtitle = html.Span(f"Sample size of public profiles: {sample_size_val:.2f}", className=sample_color)
     cards = parse_kpi_row(df_kpi)
-    df_reviews = REVIEWS.get(selected_game, pd.DataFrame())
+    df_reviews = shared_data.reviews(selected_appid) if selected_appid is not None else pd.DataFrame()
     no_matching_msg = ""
     if 'filter' in (filter_opts or []):
         # Try to load steamids from the per-game analysis file (parquet or xlsx)
-        safe_name = selected_game.replace(' ', '_').replace('/', '_')
-        analysis_parquet = os.path.join(os.path.dirname(__file__), '..', 'game_data', f'{safe_name}_analysis.parquet')
+        analysis_file = df_kpi.get('analysis_file') if not df_kpi.empty else None
+        analysis_parquet = os.path.join(os.path.dirname(__file__), '..', 'game_data', f'{analysis_file}.parquet')
         steamids = set()
         if os.path.exists(analysis_parquet):
             try:
-                df_sample = pd.read_parquet(analysis_parquet)
+                df_sample = pd.read_parquet(analysis_parquet, columns=['steamid'])
                 if 'steamid' in df_sample.columns:
                     steamids = set(df_sample['steamid'].astype(str))
             except Exception:
@@ -340,6 +321,7 @@ def update_review_dashboard_reviews(selected_game, theme_url, filter_opts):
     template = template_from_url(theme_url) if theme_url else 'bootstrap'
     # Sentiment over time
     if not df_reviews.empty:
+        df_reviews = df_reviews.copy()  # the cached frame is shared with other callbacks
         df_reviews['date'] = pd.to_datetime(df_reviews['date'], errors='coerce')
         df_reviews = df_reviews.sort_values('date')
         df_reviews['voted_up'] = df_reviews['voted_up'].astype(bool)
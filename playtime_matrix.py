@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+LONG_COLUMNS = ['steamid', 'appid', 'minutes']
+
+
+def owned_games_to_long(user_games):
+    """Flatten {steamid: GetOwnedGames list} into a (steamid uint64, appid int32, minutes int32) table"""
+    sids, appids, minutes = [], [], []
+    for sid, glist in user_games.items():
+        sid = int(sid)
+        for g in glist:
+            aid = g.get('appid')
+            if aid is None:
+                continue
+            sids.append(sid)
+            appids.append(aid)
+            minutes.append(g.get('playtime_forever') or 0)
+    return pd.DataFrame({
+        'steamid': np.array(sids, dtype=np.uint64),
+        'appid': np.array(appids, dtype=np.int32),
+        'minutes': np.array(minutes, dtype=np.int32),
+    })
+
+
+class PlaytimeMatrix:
+    """CSR view of a long playtime table: one row per user, one column per appid.
+
+    Only owned entries are stored, so memory and construction time scale with
+    the number of (user, game) pairs rather than users x distinct games.
+    """
+
+    def __init__(self, steamids, appids, indptr, indices, data):
+        self.steamids = steamids  # row labels, uint64
+        self.appids = appids  # column labels, int32
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data  # minutes
+
+    @classmethod
+    def from_long(cls, df, steamids=None):
+        """Build from a long table; steamids adds sampled users that own nothing visible"""
+        sids = df['steamid'].to_numpy(dtype=np.uint64)
+        if steamids is not None:
+            users = np.unique(np.concatenate([np.asarray([int(s) for s in steamids], dtype=np.uint64), sids]))
+        else:
+            users = np.unique(sids)
+        rows = np.searchsorted(users, sids)
+        appids, cols = np.unique(df['appid'].to_numpy(dtype=np.int32), return_inverse=True)
+        order = np.lexsort((cols, rows))
+        counts = np.bincount(rows, minlength=len(users))
+        indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        data = df['minutes'].to_numpy(dtype=np.int32)[order]
+        return cls(users, appids, indptr, cols[order].astype(np.int32), data)
+
+    @classmethod
+    def read_parquet(cls, path, steamids=None):
+        return cls.from_long(pd.read_parquet(path, columns=LONG_COLUMNS), steamids)
+
+    @property
+    def shape(self):
+        return len(self.steamids), len(self.appids)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def to_long(self):
+        """Return the (steamid, appid, minutes) table, sorted by steamid then appid"""
+        rows = np.repeat(np.arange(len(self.steamids)), np.diff(self.indptr))
+        return pd.DataFrame({
+            'steamid': self.steamids[rows],
+            'appid': self.appids[self.indices],
+            'minutes': self.data,
+        })
+
+    def column_totals(self):
+        """Total minutes per appid, aligned with self.appids"""
+        return np.bincount(self.indices, weights=self.data, minlength=len(self.appids))
+
+    def column_means(self):
+        """Average minutes per sampled user (non-owners count as zero), aligned with self.appids"""
+        n_users = len(self.steamids)
+        return self.column_totals() / n_users if n_users else np.zeros(len(self.appids))
+
+    def top_appids(self, n, played_only=True):
+        """Appids with the highest total playtime, best first"""
+        totals = self.column_totals()
+        order = np.argsort(-totals, kind='stable')
+        if played_only:
+            order = order[totals[order] > 0]
+        return self.appids[order[:n]]
+
+    def to_wide_hours(self, appids, names=None):
+        """Dense users x appids frame in hours, for small views such as the Excel export"""
+        col_pos = {aid: i for i, aid in enumerate(appids)}
+        wanted = np.array([col_pos.get(a, -1) for a in self.appids], dtype=np.int64)
+        dense = np.zeros((len(self.steamids), len(appids)))
+        rows = np.repeat(np.arange(len(self.steamids)), np.diff(self.indptr))
+        target = wanted[self.indices]
+        keep = target >= 0
+        dense[rows[keep], target[keep]] = self.data[keep] / 60
+        labels = [names.get(a, str(a)) if names else int(a) for a in appids]
+        df = pd.DataFrame(dense, columns=labels)
+        df.insert(0, 'steamid', self.steamids.astype(str))
+        return df
@@ -1,26 +1,212 @@
-import pandas as pd
-import json
 import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import game_metadata
+import steam_reviews
+
+KPIS_FILE = "merged_all_kpis.arrow"  # written by merge_game_data.py
+OTHER_GAMES_FILE = "merged_top_other_games.arrow"
+APP_NAMES_FILE = "merged_app_names.arrow"
+MERGED_FILE = "merged_game_data.xlsx"  # read only if the Arrow files are missing
+REVIEWS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reviews_data')
+CHECK_INTERVAL_SECONDS = 5  # how often a request may look for changed data files
+SETTLE_SECONDS = 2  # reload only once every watched file is this old, so a refresh's files land together
+# Every file a DataSnapshot is built from; replacing any of them triggers a reload
+WATCHED_FILES = [
+    KPIS_FILE, OTHER_GAMES_FILE, APP_NAMES_FILE, MERGED_FILE,
+    game_metadata.GAME_METADATA_FILE, game_metadata.TAGS_GENRES_FILE, game_metadata.METADATA_CACHE_FILE,
+]
+
+
+def read_arrow(path):
+    """Arrow IPC file as a DataFrame, read whole so no handle stays open.
+
+    A memory map would keep the file open for the snapshot's lifetime, and
+    Windows refuses to replace an open file when the merge rewrites it.
+    """
+    with pa.OSFile(path, 'rb') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def read_table(path, sheet_name):
+    return read_arrow(path) if os.path.exists(path) else pd.read_excel(MERGED_FILE, sheet_name=sheet_name)
+
+
+def wide_to_long(df):
+    """Long top-other-games table from an older workbook with one column per other appid"""
+    long = df.melt(id_vars='base_appid', var_name='other_appid', value_name='avg_hours')
+    long = long[long['avg_hours'] > 0].astype({'other_appid': 'int64'})
+    long = long.sort_values(['base_appid', 'avg_hours'], ascending=[True, False], kind='stable')
+    long['rank'] = long.groupby('base_appid').cumcount() + 1
+    return long.reset_index(drop=True)
+
+
+def file_signature(paths):
+    """(path, mtime_ns, size) of each existing file; it changes whenever one is rewritten or replaced"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class DataSnapshot:
+    """One consistent, read-only view of the merged tables and game metadata.
+
+    A callback takes one snapshot and uses it throughout, so a reload that
+    lands mid-callback never mixes old and new tables. Snapshots are never
+    modified; a reload builds a new one.
+    """
+
+    def __init__(self, df_kpis_all, df_other_all, df_app_names, metadata):
+        self.df_kpis_all = df_kpis_all
+        self.df_other_all = df_other_all
+        self.df_app_names = df_app_names
+        self.app_names = dict(zip(df_app_names['appid'], df_app_names['name']))  # appid -> display name
+        self.game_metadata = metadata  # genres/tags keyed by appid
+        self.base_appids = set(df_kpis_all['base_appid'])
+        # Rows of each base game are contiguous, so a lookup is two binary searches and a slice
+        self.other_base_appids = df_other_all['base_appid'].to_numpy(dtype=np.int64)
+
+    @classmethod
+    def empty(cls):
+        return cls(pd.DataFrame(columns=['base_appid', 'name']),
+                   pd.DataFrame(columns=['base_appid', 'other_appid', 'avg_hours', 'rank']),
+                   pd.DataFrame(columns=['appid', 'name']),
+                   game_metadata.GameMetadata.from_records({}))
+
+    @classmethod
+    def load(cls):
+        """Read every table; raises if any of them cannot be read"""
+        if not (os.path.exists(KPIS_FILE) or os.path.exists(MERGED_FILE)):
+            empty = cls.empty()
+            return cls(empty.df_kpis_all, empty.df_other_all, empty.df_app_names,
+                       game_metadata.load_game_metadata({}))
+        df_kpis_all = read_table(KPIS_FILE, 'All KPIs')
+        df_other_all = read_table(OTHER_GAMES_FILE, 'Top Other Games')
+        if 'other_appid' not in df_other_all.columns:
+            df_other_all = wide_to_long(df_other_all)
+        df_app_names = read_table(APP_NAMES_FILE, 'App Names')
+        # Genres/tags per appid as interned id arrays (game_metadata.parquet, or built from the JSON sources)
+        metadata = game_metadata.load_game_metadata(dict(zip(df_app_names['appid'], df_app_names['name'])))
+        return cls(df_kpis_all, df_other_all, df_app_names, metadata)
+
+    def app_name(self, appid):
+        """Display name for an appid from the merged App Names table"""
+        return self.app_names.get(appid, str(appid))
+
+    def first_appid(self):
+        return self.df_kpis_all['base_appid'].iloc[0] if not self.df_kpis_all.empty else None
+
+    def kpis(self, appid):
+        """KPI row of one base game"""
+        return self.df_kpis_all[self.df_kpis_all['base_appid'] == appid].squeeze()
+
+    def other_games(self, appid):
+        """Top other games of one base game (other_appid, avg_hours, rank), best first"""
+        if appid is None:
+            return self.df_other_all.iloc[:0]
+        lo = np.searchsorted(self.other_base_appids, appid, side='left')
+        hi = np.searchsorted(self.other_base_appids, appid, side='right')
+        return self.df_other_all.iloc[lo:hi]
+
+
+class SnapshotStore:
+    """Loads a value on first use and swaps in a fresh one when its source files change.
+
+    At most every CHECK_INTERVAL_SECONDS a request compares the files'
+    signature with the one the current value was built from. One thread
+    rebuilds while the others keep getting the current value, and the new
+    value replaces it under a lock. If a rebuild fails (for example on a
+    half-written file), the current value stays and the next check retries.
+    """
+
+    def __init__(self, loader, paths, empty, name):
+        self.loader = loader
+        self.paths = paths  # callable returning the files to watch
+        self.empty = empty
+        self.name = name
+        self._value = None
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            current = self._value
+            if current is not None and time.monotonic() < self._next_check:
+                return current
+        # Only the first load makes callers wait
+        if not self._reload_lock.acquire(blocking=current is None):
+            return current
+        try:
+            with self._lock:
+                if self._value is not current:
+                    return self._value  # another thread loaded it while this one waited
+                self._next_check = time.monotonic() + CHECK_INTERVAL_SECONDS
+            signature = file_signature(self.paths())
+            if current is not None and signature == self._signature:
+                return current
+            newest = max((mtime for _, mtime, _ in signature), default=0) / 1e9
+            if current is not None and time.time() - newest < SETTLE_SECONDS:
+                return current  # files still being written; look again on the next check
+            try:
+                value = self.loader()
+            except Exception as e:
+                print(f"Error loading {self.name}: {e}")
+                if current is not None:
+                    return current
+                value, signature = self.empty(), None
+            with self._lock:
+                self._value, self._signature = value, signature
+            if current is not None:
+                print(f"Reloaded {self.name}")
+            return value
+        finally:
+            self._reload_lock.release()
+
+
+DATA = SnapshotStore(DataSnapshot.load, lambda: WATCHED_FILES, DataSnapshot.empty, "merged data")
+
+
+def snapshot():
+    """The current DataSnapshot, loaded on first use and reloaded after a data refresh"""
+    return DATA.get()
+
+
+def load_review_frame(appid):
+    """All stored reviews of one appid with a 'date' column; empty if there are none"""
+    if not steam_reviews.review_files(REVIEWS_DIR, appid):
+        return pd.DataFrame()
+    # Base file plus any incremental sync fragments
+    df = steam_reviews.load_reviews(REVIEWS_DIR, appid)
+    if 'timestamp' in df:
+        df['date'] = pd.to_datetime(df['timestamp'], unit='s')
+    elif 'date' not in df:
+        df['date'] = pd.NaT
+    return df
+
+
+_REVIEW_STORES = {}
+_REVIEW_STORES_LOCK = threading.Lock()
+
 
-MERGED_FILE = "merged_game_data.xlsx"
-TAGS_GENRES_FILE = "game_tags_and_genres.json"
-
-df_kpis_all = pd.DataFrame()
-df_other_all = pd.DataFrame()
-TAGS_GENRES_DICT = {}
-
-if os.path.exists(MERGED_FILE):
-    try:
-        df_kpis_all = pd.read_excel(MERGED_FILE, sheet_name='All KPIs')
-    except Exception as e:
-        print(f"Error loading All KPIs: {e}")
-    try:
-        df_other_all = pd.read_excel(MERGED_FILE, sheet_name='Top Other Games')
-    except Exception as e:
-        print(f"Error loading Top Other Games: {e}")
-if os.path.exists(TAGS_GENRES_FILE):
-    try:
-        with open(TAGS_GENRES_FILE, "r", encoding="utf-8") as f:
-            TAGS_GENRES_DICT = json.load(f)
-    except Exception as e:
-        print(f"Error loading tags/genres: {e}")
+def reviews(appid):
+    """Reviews of one appid, read on first request and reloaded when its files change"""
+    with _REVIEW_STORES_LOCK:
+        store = _REVIEW_STORES.get(appid)
+        if store is None:
+            store = _REVIEW_STORES[appid] = SnapshotStore(
+                lambda: load_review_frame(appid), lambda: steam_reviews.review_files(REVIEWS_DIR, appid),
+                pd.DataFrame, f"reviews for appid {appid}")
+    return store.get()
@@ -0,0 +1,239 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# === Configuration Parameters ===
+MAX_IN_FLIGHT = 8  # default number of concurrent requests in a fetch pool
+# Minimum seconds between two requests to the same host, shared by all threads
+HOST_RATE_LIMITS = {
+    "api.steampowered.com": 0.1,
+    "store.steampowered.com": 0.2,
+    "steamspy.com": 1.0,
+}
+DEFAULT_RATE_LIMIT_SECONDS = 0.2
+MAX_RATE_LIMIT_SECONDS = 10.0  # ceiling for the adaptive per-host spacing
+RATE_LIMIT_DB = "rate_limits.sqlite"  # per-host slots shared by worker processes
+DEFAULT_TIMEOUT = 30
+MAX_RETRIES = 5  # retries after a 429/5xx response or a connection error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+class HostRateLimiter:
+    """Thread-safe per-host request spacing.
+
+    The spacing adapts: it doubles when a host answers 429 and decays back
+    towards the configured interval as requests succeed again.
+    """
+
+    def __init__(self, intervals=None, default_interval=DEFAULT_RATE_LIMIT_SECONDS):
+        self.intervals = dict(HOST_RATE_LIMITS if intervals is None else intervals)
+        self.default_interval = default_interval
+        self._current = {}
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def interval(self, host):
+        return self._current.get(host, self.intervals.get(host, self.default_interval))
+
+    def slow_down(self, host):
+        with self._lock:
+            self._current[host] = min(MAX_RATE_LIMIT_SECONDS, max(self.interval(host) * 2, 0.05))
+
+    def speed_up(self, host):
+        base = self.intervals.get(host, self.default_interval)
+        with self._lock:
+            if host in self._current:
+                current = self._current[host] * 0.9
+                if current <= base:
+                    del self._current[host]
+                else:
+                    self._current[host] = current
+
+    def wait(self, host):
+        """Block until the next request slot for host is due"""
+        interval = self.interval(host)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, host, seconds):
+        """Hold back every request to host for at least seconds (Retry-After, backoff)"""
+        with self._lock:
+            now = time.monotonic()
+            self._next_slot[host] = max(self._next_slot.get(host, now), now + seconds)
+
+
+class SharedRateLimiter(HostRateLimiter):
+    """Per-host request spacing shared across processes through a SQLite table.
+
+    Every process reserves its slot inside one write transaction, so the
+    combined rate of all workers stays within HOST_RATE_LIMITS.
+    """
+
+    def __init__(self, path=RATE_LIMIT_DB, intervals=None, default_interval=DEFAULT_RATE_LIMIT_SECONDS):
+        super().__init__(intervals, default_interval)
+        self.path = os.path.abspath(path)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS host_slots (host TEXT PRIMARY KEY, next_slot REAL)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def wait(self, host):
+        interval = self.interval(host)
+        conn = self._connection()
+        # Wall-clock time, since monotonic clocks are not comparable between processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT next_slot FROM host_slots WHERE host = ?", (host,)).fetchone()
+            slot = max(now, row[0]) if row else now
+            conn.execute("INSERT OR REPLACE INTO host_slots (host, next_slot) VALUES (?, ?)", (host, slot + interval))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, host, seconds):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            until = time.time() + seconds
+            conn.execute(
+                "INSERT INTO host_slots (host, next_slot) VALUES (?, ?) "
+                "ON CONFLICT(host) DO UPDATE SET next_slot = max(next_slot, excluded.next_slot)",
+                (host, until),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+RATE_LIMITER = HostRateLimiter()
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def use_shared_rate_limiter(path=RATE_LIMIT_DB):
+    """Switch this process to the cross-process limiter; used as a worker pool initializer"""
+    global RATE_LIMITER
+    RATE_LIMITER = SharedRateLimiter(path)
+
+
+def session_for(host):
+    """Keep-alive session for host, pooled across threads (one set per process)"""
+    key = (os.getpid(), host)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_IN_FLIGHT)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSIONS[key] = session
+    return session
+
+
+def retry_after_seconds(resp):
+    """Seconds requested by a Retry-After header (delta or HTTP date), or None"""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_seconds(attempt):
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def get(url, max_retries=MAX_RETRIES, **kwargs):
+    """GET through the pooled session for the host, respecting the shared rate limit.
+
+    429 and 5xx responses and connection errors are retried with jittered
+    exponential backoff (or the server's Retry-After); a 429 also slows the
+    host down for everyone. The last response is returned once retries run
+    out, and the last connection error is raised.
+    """
+    host = urlparse(url).netloc
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    session = session_for(host)
+    for attempt in range(max_retries + 1):
+        RATE_LIMITER.wait(host)
+        try:
+            resp = session.get(url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff_seconds(attempt)
+            print(f"Request to {host} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            RATE_LIMITER.defer(host, delay)
+            continue
+        if resp.status_code not in RETRY_STATUSES:
+            RATE_LIMITER.speed_up(host)
+            return resp
+        if attempt == max_retries:
+            print(f"Giving up on {host} after {max_retries} retries (HTTP {resp.status_code})")
+            return resp
+        if resp.status_code == 429:
+            RATE_LIMITER.slow_down(host)
+        delay = retry_after_seconds(resp)
+        if delay is None:
+            delay = backoff_seconds(attempt)
+        print(f"HTTP {resp.status_code} from {host}, retrying in {delay:.1f}s")
+        RATE_LIMITER.defer(host, delay)
+
+
+def map_concurrent(func, items, max_workers=MAX_IN_FLIGHT):
+    """Yield (item, func(item)) in input order using a bounded thread pool.
+
+    At most max_workers calls run at once and only a small window of work is
+    queued ahead, so breaking out of the loop early wastes few requests.
+    """
+    items = iter(items)
+    window = max(1, max_workers) * 2
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        try:
+            for item in items:
+                pending.append((item, pool.submit(func, item)))
+                if len(pending) >= window:
+                    done_item, future = pending.popleft()
+                    yield done_item, future.result()
+            while pending:
+                done_item, future = pending.popleft()
+                yield done_item, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,99 @@
+import sqlite3
+import time
+
+import steam_http
+
+PLAYER_SUMMARIES_URL = "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/"
+MAX_STEAMIDS_PER_REQUEST = 100  # GetPlayerSummaries limit
+PUBLIC_VISIBILITY_STATE = 3
+VISIBILITY_DB = "profile_visibility.sqlite"  # shared across games and runs
+VISIBILITY_TTL_DAYS = 30  # re-check profiles classified longer ago than this
+SQLITE_MAX_VARIABLES = 900
+
+
+class VisibilityStore:
+    """On-disk steamid -> (is_public, last checked) cache with a TTL"""
+
+    def __init__(self, path=VISIBILITY_DB, ttl_days=VISIBILITY_TTL_DAYS):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS visibility ("
+            "steamid TEXT PRIMARY KEY, is_public INTEGER NOT NULL, checked_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, steamids):
+        """Return {steamid: is_public} for steamids checked within the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        known = {}
+        for i in range(0, len(steamids), SQLITE_MAX_VARIABLES):
+            chunk = steamids[i:i + SQLITE_MAX_VARIABLES]
+            rows = self.conn.execute(
+                f"SELECT steamid, is_public FROM visibility WHERE checked_at >= ? "
+                f"AND steamid IN ({','.join('?' * len(chunk))})",
+                [cutoff, *chunk]
+            )
+            known.update((sid, bool(is_public)) for sid, is_public in rows)
+        self.hits += len(known)
+        self.misses += len(steamids) - len(known)
+        return known
+
+    def record(self, visibility):
+        """Store freshly checked {steamid: is_public} results"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO visibility (steamid, is_public, checked_at) VALUES (?, ?, ?)",
+            [(sid, int(is_public), now) for sid, is_public in visibility.items()]
+        )
+        self.conn.commit()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self):
+        print(f"Visibility store '{self.path}': {self.hits} hits, {self.misses} API checks "
+              f"({self.hit_rate():.1%} hit rate)")
+
+    def close(self):
+        self.conn.close()
+
+
+def fetch_visibility_batch(api_key, steamids):
+    """Return {steamid: is_public} for up to 100 steamids in one GetPlayerSummaries call"""
+    resp = steam_http.get(
+        PLAYER_SUMMARIES_URL,
+        params={"key": api_key, "steamids": ",".join(steamids)}
+    )
+    if not resp.ok:
+        print(f"GetPlayerSummaries failed with status {resp.status_code} for {len(steamids)} steamids")
+        return {}
+    players = resp.json().get('response', {}).get('players', [])
+    visibility = {sid: False for sid in steamids}
+    for p in players:
+        sid = p.get('steamid')
+        if sid in visibility:
+            visibility[sid] = p.get('communityvisibilitystate') == PUBLIC_VISIBILITY_STATE
+    return visibility
+
+
+def resolve_public_steamids(api_key, steamids, max_workers=steam_http.MAX_IN_FLIGHT, store=None):
+    """Return the set of public steamids, checking 100 ids per request.
+
+    When a VisibilityStore is given, steamids it already knows are answered
+    from disk and only the rest are sent to the API.
+    """
+    unique = list(dict.fromkeys(str(sid) for sid in steamids if sid))
+    known = store.lookup(unique) if store is not None else {}
+    public = {sid for sid, is_public in known.items() if is_public}
+    unknown = [sid for sid in unique if sid not in known]
+    batches = [unknown[i:i + MAX_STEAMIDS_PER_REQUEST] for i in range(0, len(unknown), MAX_STEAMIDS_PER_REQUEST)]
+    for _, visibility in steam_http.map_concurrent(lambda b: fetch_visibility_batch(api_key, b), batches, max_workers):
+        if store is not None:
+            store.record(visibility)
+        public.update(sid for sid, is_public in visibility.items() if is_public)
+    return public
@@ -0,0 +1,332 @@
+import glob
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+
+import steam_http
+
+REVIEWS_URL = "https://store.steampowered.com/appreviews/{appid}"
+REVIEW_HEADERS = {"User-Agent": "Mozilla/5.0"}
+REVIEW_COLUMNS = ["appid", "steamid", "review", "timestamp", "voted_up",
+                  "playtime_forever", "language", "review_id"]
+REVIEW_SCHEMA = pa.schema([
+    ("appid", pa.int64()), ("steamid", pa.string()), ("review", pa.string()),
+    ("timestamp", pa.int64()), ("voted_up", pa.bool_()), ("playtime_forever", pa.int64()),
+    ("language", pa.string()), ("review_id", pa.string()),
+])
+STREAM_ROW_GROUP_REVIEWS = 1000  # reviews buffered in memory before they are written as a row group
+STREAM_SEGMENT_ROW_GROUPS = 20  # row groups per closed file; the checkpoint advances when a file closes
+
+
+class ReviewCursor:
+    """Walks the appreviews cursor once per (appid, language, filter, cc), caching every page.
+
+    Iterating replays the cached pages first and only requests pages beyond
+    the deepest one seen so far, so repeated walks with wider date windows
+    cost as many requests as the deepest walk.
+    """
+
+    def __init__(self, appid, language="all", review_filter="recent", cc="all", per_page=100, keep_pages=True):
+        self.appid = appid
+        self.keep_pages = keep_pages  # False keeps only last_page, for streaming downloads
+        self.params = {
+            "json": 1,
+            "filter": review_filter,
+            "language": language,
+            "purchase_type": "all",
+            "cc": cc,
+            "num_per_page": per_page,
+        }
+        self.pages = []
+        self.last_page = []
+        self.cursor = "*"
+        self.exhausted = False
+        self.requests = 0
+
+    def fetch_next_page(self):
+        """Fetch the page after the last cached one; return False if it could not be fetched"""
+        url = REVIEWS_URL.format(appid=self.appid)
+        self.requests += 1
+        try:
+            # steam_http retries 429/5xx and connection errors with backoff
+            resp = steam_http.get(url, params={**self.params, "cursor": self.cursor},
+                                  headers=REVIEW_HEADERS, timeout=30)
+            resp.raise_for_status()
+            data = resp.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Giving up on reviews page for {self.appid}: {e}")
+            return False
+        batch = data.get("reviews", [])
+        next_cursor = data.get("cursor")
+        self.last_page = batch
+        if batch and self.keep_pages:
+            self.pages.append(batch)
+        if not batch or not next_cursor or next_cursor == self.cursor:
+            self.exhausted = True
+        else:
+            self.cursor = next_cursor
+        return True
+
+    def __iter__(self):
+        page = 0
+        while True:
+            if page < len(self.pages):
+                yield from self.pages[page]
+                page += 1
+            elif self.exhausted or not self.fetch_next_page():
+                return
+
+
+def reviews_in_window(cursor, start_date, end_date, max_reviews):
+    """Collect up to max_reviews reviews created between start_date and end_date from a ReviewCursor"""
+    start_ts = int(start_date.timestamp())
+    end_ts = int(end_date.timestamp())
+    reviews = []
+    for r in cursor:
+        ts = r.get('timestamp_created', 0)
+        if ts < start_ts:
+            break
+        if ts <= end_ts:
+            reviews.append(r)
+            if len(reviews) >= max_reviews:
+                break
+    return reviews
+
+
+def review_row(appid, r):
+    """Flatten an appreviews entry into the stored review schema"""
+    return {
+        "appid": appid,
+        "steamid": r.get("author", {}).get("steamid"),
+        "review": r.get("review"),
+        "timestamp": r.get("timestamp_created"),
+        "voted_up": r.get("voted_up"),
+        "playtime_forever": r.get("author", {}).get("playtime_forever"),
+        "language": r.get("language"),
+        "review_id": r.get("recommendationid")
+    }
+
+
+def review_files(folder, appid):
+    """Base reviews_<appid>.parquet followed by its incremental fragments, oldest first"""
+    base = os.path.join(folder, f"reviews_{appid}.parquet")
+    fragments = sorted(glob.glob(os.path.join(folder, f"reviews_{appid}.*.parquet")))
+    return ([base] if os.path.exists(base) else []) + fragments
+
+
+def load_reviews(folder, appid, columns=None):
+    """Read the base file and all fragments for appid as one DataFrame"""
+    files = review_files(folder, appid)
+    if not files:
+        return pd.DataFrame(columns=columns or REVIEW_COLUMNS)
+    df = pd.concat([pd.read_parquet(f, columns=columns) for f in files], ignore_index=True)
+    if "review_id" in df.columns:
+        df = df.drop_duplicates(subset=["review_id"], keep="last").reset_index(drop=True)
+    return df
+
+
+def stored_review_state(folder, appid):
+    """Return (newest stored timestamp, set of stored review_ids) for appid"""
+    df = load_reviews(folder, appid, columns=["timestamp", "review_id"])
+    if df.empty:
+        return None, set()
+    return int(df["timestamp"].max()), set(df["review_id"].astype(str))
+
+
+def fragment_stamp(folder, appid):
+    """Timestamp for new fragment names, unique even for syncs within the same second"""
+    while True:
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        if not glob.glob(os.path.join(folder, f"reviews_{appid}.{stamp}.*")):
+            return stamp
+
+
+def review_ids_at(folder, appid, timestamp):
+    """review_ids stored for appid with exactly this creation timestamp"""
+    ids = set()
+    for f in review_files(folder, appid):
+        df = pd.read_parquet(f, columns=["review_id"], filters=[("timestamp", "==", timestamp)])
+        ids.update(df["review_id"].astype(str))
+    return ids
+
+
+def write_reviews(folder, appid, rows, replace=False):
+    """Write rows as the base file (first sync or replace) or as a new fragment; return the path"""
+    df = pd.DataFrame(rows, columns=REVIEW_COLUMNS)
+    existing = review_files(folder, appid)
+    if replace or not existing:
+        for f in existing:
+            os.remove(f)
+        path = os.path.join(folder, f"reviews_{appid}.parquet")
+    else:
+        path = os.path.join(folder, f"reviews_{appid}.{fragment_stamp(folder, appid)}.parquet")
+        if os.path.exists(path):
+            raise FileExistsError(f"Review fragment '{path}' already exists")
+    df.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def sync_reviews(appid, out_folder, max_reviews, game_name=None, incremental=True, stream=False):
+    """Fetch review text for appid, paging only until already-stored reviews when incremental"""
+    if stream:
+        return stream_reviews(appid, out_folder, max_reviews, game_name, incremental)
+    display_name = f"appid {appid}" if not game_name else f"appid {appid} ('{game_name}')"
+    newest_ts, known_ids = stored_review_state(out_folder, appid) if incremental else (None, set())
+    if known_ids:
+        print(f"Syncing reviews newer than {datetime.fromtimestamp(newest_ts):%Y-%m-%d %H:%M} for {display_name}...")
+        cursor = ReviewCursor(appid, "all", "recent")
+    else:
+        print(f"Fetching up to {max_reviews} reviews for {display_name}...")
+        cursor = ReviewCursor(appid, "all", "all")
+    rows = []
+    for r in cursor:
+        if known_ids and (str(r.get("recommendationid")) in known_ids or r.get("timestamp_created", 0) < newest_ts):
+            break
+        rows.append(review_row(appid, r))
+        if len(rows) >= max_reviews:
+            break
+    if not rows:
+        print(f"No new reviews found for {display_name} ({cursor.requests} requests)")
+        return None
+    path = write_reviews(out_folder, appid, rows, replace=not known_ids)
+    print(f"Saved {len(rows)} reviews for {display_name} to {path} ({cursor.requests} requests)")
+    return path
+
+
+def checkpoint_path(folder, appid):
+    return os.path.join(folder, f"reviews_{appid}.checkpoint.json")
+
+
+def save_checkpoint(folder, appid, state):
+    path = checkpoint_path(folder, appid)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+class SegmentWriter:
+    """Writes review rows as parquet row groups into numbered fragment files.
+
+    Rows are buffered up to STREAM_ROW_GROUP_REVIEWS and flushed as one row
+    group; after STREAM_SEGMENT_ROW_GROUPS row groups the file is closed and
+    renamed into place, at which point everything written so far is durable.
+    """
+
+    def __init__(self, folder, appid, stamp, segment):
+        self.folder = folder
+        self.appid = appid
+        self.stamp = stamp
+        self.segment = segment
+        self.buffer = []
+        self.writer = None
+        self.row_groups = 0
+
+    def segment_path(self):
+        return os.path.join(self.folder, f"reviews_{self.appid}.{self.stamp}.{self.segment:04d}.parquet")
+
+    def add(self, row):
+        self.buffer.append(row)
+
+    def flush(self):
+        """Write the buffer as a row group; return True if that closed a segment file"""
+        if not self.buffer:
+            return False
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.segment_path() + ".partial", REVIEW_SCHEMA, compression="zstd")
+        self.writer.write_table(pa.Table.from_pylist(self.buffer, schema=REVIEW_SCHEMA))
+        self.buffer = []
+        self.row_groups += 1
+        if self.row_groups >= STREAM_SEGMENT_ROW_GROUPS:
+            self.close()
+            return True
+        return False
+
+    def close(self):
+        if self.buffer:
+            self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            if os.path.exists(self.segment_path()):
+                raise FileExistsError(f"Review fragment '{self.segment_path()}' already exists")
+            os.replace(self.segment_path() + ".partial", self.segment_path())
+            self.writer = None
+            self.row_groups = 0
+            self.segment += 1
+
+
+def stream_reviews(appid, out_folder, max_reviews, game_name=None, incremental=True):
+    """Streaming sync_reviews: memory stays flat and an interrupted download resumes.
+
+    Reviews go to reviews_<appid>.<stamp>.<NNNN>.parquet fragments written
+    row group by row group. reviews_<appid>.checkpoint.json records the
+    cursor after the last closed fragment; if it exists, the download
+    continues from there instead of starting over.
+    """
+    display_name = f"appid {appid}" if not game_name else f"appid {appid} ('{game_name}')"
+    checkpoint = checkpoint_path(out_folder, appid)
+    if os.path.exists(checkpoint):
+        with open(checkpoint, encoding="utf-8") as f:
+            state = json.load(f)
+        for partial in glob.glob(os.path.join(out_folder, f"reviews_{appid}.{state['stamp']}.*.parquet.partial")):
+            os.remove(partial)
+        print(f"Resuming review download for {display_name} after {state['rows']} reviews...")
+    else:
+        newest_ts, known_ids = stored_review_state(out_folder, appid) if incremental else (None, set())
+        state = {
+            "stamp": fragment_stamp(out_folder, appid),
+            "segment": 0,
+            "cursor": "*",
+            "rows": 0,
+            "filter": "recent" if known_ids else "all",
+            "newest_ts": newest_ts if known_ids else None,
+            # A full download replaces what is stored, once it has completed
+            "replace_files": [] if known_ids else review_files(out_folder, appid),
+        }
+        save_checkpoint(out_folder, appid, state)
+        print(f"Streaming up to {max_reviews} reviews for {display_name}...")
+    # The walk is newest first and stops below newest_ts, so only ids stored at exactly newest_ts are needed
+    known_ids = set()
+    if state["newest_ts"] is not None:
+        known_ids = review_ids_at(out_folder, appid, state["newest_ts"])
+    cursor = ReviewCursor(appid, "all", state["filter"], keep_pages=False)
+    cursor.cursor = state["cursor"]
+    writer = SegmentWriter(out_folder, appid, state["stamp"], state["segment"])
+    rows = state["rows"]
+    done = False
+    while not done and not cursor.exhausted:
+        if not cursor.fetch_next_page():
+            # Everything up to the current cursor is buffered, so close the file and checkpoint there
+            writer.close()
+            state.update(segment=writer.segment, cursor=cursor.cursor, rows=rows)
+            save_checkpoint(out_folder, appid, state)
+            print(f"Stopped {display_name} after {rows} reviews; the next run resumes from the checkpoint")
+            return None
+        for r in cursor.last_page:
+            if state["newest_ts"] is not None and (str(r.get("recommendationid")) in known_ids
+                                                   or r.get("timestamp_created", 0) < state["newest_ts"]):
+                done = True
+                break
+            writer.add(review_row(appid, r))
+            rows += 1
+            if rows >= max_reviews:
+                done = True
+                break
+        if len(writer.buffer) >= STREAM_ROW_GROUP_REVIEWS and writer.flush():
+            state.update(segment=writer.segment, cursor=cursor.cursor, rows=rows)
+            save_checkpoint(out_folder, appid, state)
+    writer.close()
+    for f in state["replace_files"]:
+        if os.path.exists(f):
+            os.remove(f)
+    os.remove(checkpoint)
+    if not rows:
+        print(f"No new reviews found for {display_name} ({cursor.requests} requests)")
+        return None
+    print(f"Saved {rows} reviews for {display_name} in {writer.segment} fragment(s) ({cursor.requests} requests)")
+    return rows
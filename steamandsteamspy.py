@@ -1,10 +1,13 @@
 import os
-import time
 import json
 from datetime import datetime
 from dotenv import load_dotenv, find_dotenv
-import requests
+import steam_http
+import steamspy
 import pandas as pd
+import steam_profiles
+import app_index
+import app_list_cache
 
 # === Configuration Parameters ===
 GAME_NAMES = ["Slay the Spire"]  # List of target game names to sample
@@ -17,24 +20,6 @@ CACHE_FILE = "metadata_cache.json"  # Persistent cache for genres & tags
 
 # === Helper Functions ===
 
-def load_app_list():
-    """Fetch full Steam AppList"""
-    resp = requests.get("https://api.steampowered.com/ISteamApps/GetAppList/v2/")
-    resp.raise_for_status()
-    apps = resp.json().get('applist', {}).get('apps', [])
-    return {app['name']: app['appid'] for app in apps}
-
-
-def find_appid(apps_map, name):
-    """Lookup AppID by name"""
-    if name in apps_map:
-        return apps_map[name]
-    for n, aid in apps_map.items():
-        if name.lower() in n.lower():
-            return aid
-    return None
-
-
 def get_reviews(app_id, country, language, per_page, start_date, end_date, max_reviews):
     """Paginate Steam Store reviews"""
     start_ts = int(start_date.timestamp())
@@ -51,7 +36,7 @@ def get_reviews(app_id, country, language, per_page, start_date, end_date, max_r
             "num_per_page": per_page,
             "cursor": cursor
         }
-        resp = requests.get(
+        resp = steam_http.get(
             f"https://store.steampowered.com/appreviews/{app_id}",
             params=params, headers=headers
         )
@@ -69,25 +54,12 @@ def get_reviews(app_id, country, language, per_page, start_date, end_date, max_r
                 if len(reviews) >= max_reviews:
                     break
         cursor = data.get('cursor', cursor)
-        time.sleep(0.2)
     return reviews
 
 
-def is_profile_public(api_key, steam_id):
-    """Check profile visibility via GetPlayerSummaries"""
-    resp = requests.get(
-        "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
-        params={"key": api_key, "steamids": steam_id}
-    )
-    if resp.ok:
-        players = resp.json().get('response', {}).get('players', [])
-        return bool(players and players[0].get('communityvisibilitystate') == 3)
-    return False
-
-
 def get_owned_games(api_key, steam_id):
     """Fetch owned games (name + playtime)"""
-    resp = requests.get(
+    resp = steam_http.get(
         "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/",
         params={
             "key": api_key,
@@ -103,28 +75,6 @@ def get_owned_games(api_key, steam_id):
     return resp.json().get('response', {}).get('games', [])
 
 
-def fetch_spy_tags(appid):
-    """Fetch community tags from SteamSpy"""
-    url = f"https://steamspy.com/api.php?request=appdetails&appid={appid}"
-    resp = requests.get(url)
-    if not resp.ok:
-        return []
-    data = resp.json()
-    tags = data.get('tags', {})
-    return list(tags.keys()) if isinstance(tags, dict) else []
-
-
-def fetch_spy_genres(appid):
-    """Fetch genres from SteamSpy response"""
-    url = f"https://steamspy.com/api.php?request=appdetails&appid={appid}"
-    resp = requests.get(url)
-    if not resp.ok:
-        return []
-    data = resp.json()
-    genres = data.get('genre', [])
-    return genres if isinstance(genres, list) else []
-
-
 def main():
     # Load API key
     load_dotenv(find_dotenv(), override=True)
@@ -133,19 +83,22 @@ def main():
         raise RuntimeError('STEAM_API_KEY missing in .env')
 
     # Load App list and persistent cache
-    apps_map = load_app_list()
+    app_list = app_list_cache.load_app_list()
+    name_index = app_list.name_index
+    visibility_store = steam_profiles.VisibilityStore()
     if os.path.exists(CACHE_FILE):
         with open(CACHE_FILE, 'r') as f:
             cache = json.load(f)
     else:
         cache = {}
+    tag_vocabulary = steamspy.load_tag_vocabulary()
 
     start_date = datetime.strptime(START_DATE_STR, '%Y-%m-%d')
     end_date = datetime.strptime(END_DATE_STR, '%Y-%m-%d')
 
     for game_name in GAME_NAMES:
         print(f"\nProcessing '{game_name}'...")
-        appid = find_appid(apps_map, game_name)
+        appid = app_index.find_appid(name_index, game_name)
         if not appid:
             print(f"AppID not found for '{game_name}', skipping.")
             continue
@@ -153,13 +106,11 @@ def main():
         # Sample reviews and public users
         reviews = get_reviews(appid, MARKET, LANGUAGE, 100,
                               start_date, end_date, SAMPLE_SIZE)
-        steamids = []
-        for rev in reviews:
-            sid = rev.get('author', {}).get('steamid')
-            if sid and sid not in steamids and is_profile_public(api_key, sid):
-                steamids.append(sid)
-            if len(steamids) >= SAMPLE_SIZE:
-                break
+        candidate_steamids = list(dict.fromkeys(
+            rev.get('author', {}).get('steamid') for rev in reviews if rev.get('author', {}).get('steamid')
+        ))
+        public_ids = steam_profiles.resolve_public_steamids(api_key, candidate_steamids, store=visibility_store)
+        steamids = [sid for sid in candidate_steamids if sid in public_ids][:SAMPLE_SIZE]
         print(f"Found {len(steamids)} public users")
 
         # Collect needed AppIDs from user libraries
@@ -173,13 +124,12 @@ def main():
 
         print(f"Total unique 'other games' encountered: {len(needed)}")
 
-        # Fetch missing metadata and update cache
-        for aid in needed:
-            if aid not in cache:
-                cache[aid] = {
-                    'genres': fetch_spy_genres(aid),
-                    'tags': fetch_spy_tags(aid)
-                }
+        # Fetch missing metadata and update cache; large sets come from SteamSpy's
+        # genre/tag listings, small ones from one appdetails call per app
+        missing = [aid for aid in needed if aid not in cache]
+        if missing:
+            harvested = steamspy.harvest_tags_genres(missing, tag_vocabulary)
+            cache.update((str(aid), meta) for aid, meta in harvested.items())
         # Persist cache
         with open(CACHE_FILE, 'w') as f:
             json.dump(cache, f)
@@ -213,6 +163,8 @@ def main():
             df_gen.to_excel(writer, sheet_name='Other Genres', index=False)
             df_tag.to_excel(writer, sheet_name='Other Tags', index=False)
         print(f"Exported to {outfile}")
+    visibility_store.report()
+    visibility_store.close()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,294 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import requests
+
+import steam_http
+
+# === Configuration Parameters ===
+APPDETAILS_URL = "https://steamspy.com/api.php?request=appdetails&appid={appid}"
+DETAILS_DB = "steamspy_details.sqlite"  # appdetails responses, kept across daily runs
+LISTING_URL = "https://steamspy.com/api.php"  # request=genre / request=tag / request=all
+GENRES = [
+    "Action", "Adventure", "Casual", "Early Access", "Free to Play", "Indie",
+    "Massively Multiplayer", "RPG", "Racing", "Simulation", "Sports", "Strategy",
+    "Animation & Modeling", "Audio Production", "Design & Illustration", "Education",
+    "Game Development", "Photo Editing", "Software Training", "Utilities",
+    "Video Production", "Web Publishing",
+]
+MAX_TAGS = 20  # appdetails reports the top 20 tags per app
+# Snapshot columns taken from appdetails where the request=all summary lacks them
+SNAPSHOT_DETAIL_FIELDS = [
+    'developer', 'publisher', 'score_rank', 'positive', 'negative', 'userscore',
+    'owners', 'average_forever', 'average_2weeks', 'median_forever', 'median_2weeks',
+    'ccu', 'price', 'initialprice', 'discount', 'release_date', 'genre',
+]
+SNAPSHOT_NUMERIC_FIELDS = [
+    'score_rank', 'positive', 'negative', 'userscore', 'average_forever', 'average_2weeks',
+    'median_forever', 'median_2weeks', 'ccu', 'price', 'initialprice', 'discount',
+]
+# Files whose tag lists seed the tag vocabulary (SteamSpy has no endpoint listing all tags)
+TAG_SOURCE_FILES = ["game_tags_and_genres.json", "metadata_cache.json"]
+KPI_KEYS = ['appid', 'name', 'developer', 'publisher', 'score_rank',
+            'owners', 'average_forever', 'average_2weeks',
+            'median_forever', 'median_2weeks', 'ccu',
+            'price', 'initialprice', 'discount']
+
+
+def fetch_appdetails(appid):
+    """One SteamSpy appdetails request; raises if it fails after steam_http's retries"""
+    resp = steam_http.get(APPDETAILS_URL.format(appid=appid))
+    resp.raise_for_status()
+    data = resp.json()
+    return data if isinstance(data, dict) else {}
+
+
+class SingleFlightCache:
+    """Memoizes func per key for the run; concurrent callers for a key share one call.
+
+    Failures are not cached: callers waiting on the failed call see the
+    error, and the next caller tries again.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self._results = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+            flight = self._in_flight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._in_flight[key] = {"done": threading.Event()}
+                self.calls += 1
+        if not owner:
+            flight["done"].wait()
+            if "error" in flight:
+                raise flight["error"]
+            return flight["result"]
+        try:
+            flight["result"] = self.func(key)
+            with self._lock:
+                self._results[key] = flight["result"]
+            return flight["result"]
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight["done"].set()
+
+
+APPDETAILS = SingleFlightCache(fetch_appdetails)
+
+
+def appdetails(appid):
+    """SteamSpy appdetails for appid, fetched at most once per run; {} if unavailable"""
+    try:
+        return APPDETAILS.get(int(appid))
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"SteamSpy appdetails unavailable for appid {appid}: {e}")
+        return {}
+
+
+def fetch_kpis(appid):
+    data = appdetails(appid)
+    if not data:
+        return {}
+    return {k: data.get(k) for k in KPI_KEYS}
+
+
+def fetch_tags(appid):
+    tags = appdetails(appid).get('tags')
+    return list(tags.keys()) if isinstance(tags, dict) else []
+
+
+def parse_genres(details):
+    # SteamSpy returns genres as one comma-separated string
+    genres = details.get('genre')
+    if isinstance(genres, str):
+        return [g.strip() for g in genres.split(',') if g.strip()]
+    return genres if isinstance(genres, list) else []
+
+
+def fetch_genres(appid):
+    return parse_genres(appdetails(appid))
+
+
+def fetch_listing(request, **params):
+    """{appid: summary} from a SteamSpy listing endpoint; raises rather than returning a partial map"""
+    resp = steam_http.get(LISTING_URL, params={"request": request, **params}, timeout=120)
+    resp.raise_for_status()
+    data = resp.json()
+    return {int(aid): info for aid, info in data.items()} if isinstance(data, dict) else {}
+
+
+def load_tag_vocabulary(paths=TAG_SOURCE_FILES, details_db=DETAILS_DB):
+    """Every tag seen in the metadata files or the appdetails store"""
+    tags = set()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for info in json.load(f).values():
+                    tags.update(info.get("tags") or [])
+    if os.path.exists(details_db):
+        store = AppDetailsStore(details_db)
+        for data in store.load().values():
+            if isinstance(data.get("tags"), dict):
+                tags.update(data["tags"])
+        store.close()
+    return sorted(tags)
+
+
+def harvest_tags_genres(appids, tags, genres=GENRES):
+    """Return {appid: {'genres': [...], 'tags': [...]}} for appids.
+
+    Each genre and tag listing is one request covering every app in it, so
+    for large app sets the mapping is built from the listings and only apps
+    missing from all of them fall back to per-app appdetails calls. Listings
+    carry no vote counts, so tags are ordered by how common they are.
+    """
+    targets = {int(aid) for aid in appids}
+    result = {}
+    if len(targets) > len(genres) + len(tags):
+        app_genres, app_tags, tag_sizes = defaultdict(list), defaultdict(list), Counter()
+        for i, genre in enumerate(genres, 1):
+            for aid in targets.intersection(fetch_listing("genre", genre=genre)):
+                app_genres[aid].append(genre)
+            print(f"Harvested genre listing {i}/{len(genres)}: {genre}")
+        for i, tag in enumerate(tags, 1):
+            listing = fetch_listing("tag", tag=tag)
+            tag_sizes[tag] = len(listing)
+            for aid in targets.intersection(listing):
+                app_tags[aid].append(tag)
+            if i % 50 == 0 or i == len(tags):
+                print(f"Harvested {i}/{len(tags)} tag listings")
+        for aid in targets:
+            if aid in app_genres or aid in app_tags:
+                ranked = sorted(app_tags[aid], key=lambda t: -tag_sizes[t])
+                result[aid] = {"genres": sorted(app_genres[aid]), "tags": ranked[:MAX_TAGS]}
+    residue = [aid for aid in targets if aid not in result]
+    print(f"{len(result)} apps covered by listings, {len(residue)} fetched per app")
+    for aid in residue:
+        result[aid] = {"genres": fetch_genres(aid), "tags": fetch_tags(aid)}
+    return result
+
+
+def dictionary_list_array(lists):
+    """list<dictionary<string>> Arrow array; repeated tags/languages are stored once"""
+    if not isinstance(lists, pa.Array):
+        lists = pa.array(lists, pa.list_(pa.string()))
+    return pa.ListArray.from_arrays(lists.offsets, lists.values.dictionary_encode())
+
+
+def snapshot_table(all_games, details):
+    """Arrow table of the request=all summary joined with stored appdetails.
+
+    Columns are filled with whole-column operations; only the tag dicts need
+    one pass in Python. tags and languages become list columns and numeric
+    SteamSpy fields (which arrive as numbers or strings) are typed.
+    """
+    summary = pd.DataFrame.from_dict(all_games, orient='index')
+    summary['appid'] = summary.index.astype('int64')
+    summary = summary.reset_index(drop=True)
+    detail = pd.DataFrame.from_records(
+        list(details.values()), index=pd.Index(list(details.keys()), dtype='int64'),
+        columns=SNAPSHOT_DETAIL_FIELDS + ['tags', 'languages'],
+    ).reindex(summary['appid'].to_numpy())
+    for field in SNAPSHOT_DETAIL_FIELDS:
+        values = detail[field].to_numpy()
+        # Stored details can be a few days old; today's summary wins where it has the field
+        summary[field] = summary[field].fillna(pd.Series(values)) if field in summary.columns else values
+    for field in SNAPSHOT_NUMERIC_FIELDS:
+        summary[field] = pd.to_numeric(summary[field], errors='coerce')
+    tags = [list(t) if isinstance(t, dict) else [] for t in detail['tags'].to_numpy()]
+    languages = detail['languages'].where(detail['languages'].astype(bool) & detail['languages'].notna(), None)
+    languages = pa.array(languages.to_numpy(), pa.string(), from_pandas=True)
+    languages = pc.fill_null(pc.split_pattern(languages, ', '), pa.scalar([], pa.list_(pa.string())))
+    table = pa.Table.from_pandas(summary, preserve_index=False)
+    table = table.append_column('tags', dictionary_list_array(tags))
+    return table.append_column('languages', dictionary_list_array(languages))
+
+
+def snapshot_csv_frame(table):
+    """DataFrame for CSV output, with list columns joined by ', '"""
+    df = table.to_pandas()
+    for col in ('tags', 'languages'):
+        df[col] = [', '.join(v) for v in df[col]]
+    return df
+
+
+class AppDetailsStore:
+    """Crash-safe appid -> appdetails store; each response is one committed row.
+
+    The store is not date-stamped, so a day's run starts from everything
+    fetched before and only refreshes missing or stale entries.
+    """
+
+    def __init__(self, path=DETAILS_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        # WAL keeps every committed row intact if the process dies mid-run
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS details ("
+            "appid INTEGER PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM details").fetchone()[0]
+
+    def fetched_at(self):
+        """Return {appid: fetch timestamp} without decoding any responses"""
+        return dict(self.conn.execute("SELECT appid, fetched_at FROM details"))
+
+    def stale(self, appids, max_age_days):
+        """Appids that are missing or older than max_age_days, missing ones first"""
+        cutoff = time.time() - max_age_days * 86400
+        fetched = self.fetched_at()
+        missing = [aid for aid in appids if aid not in fetched]
+        old = sorted((aid for aid in appids if aid in fetched and fetched[aid] < cutoff), key=fetched.get)
+        return missing + old
+
+    def load(self):
+        """Return {appid: appdetails dict} for every stored app"""
+        return {appid: json.loads(data) for appid, data in self.conn.execute("SELECT appid, data FROM details")}
+
+    def put(self, appid, data, fetched_at=None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO details (appid, data, fetched_at) VALUES (?, ?, ?)",
+            (int(appid), json.dumps(data, ensure_ascii=False), fetched_at or time.time())
+        )
+        self.conn.commit()
+
+    def import_json(self, path, fetched_at):
+        """Seed from a legacy {appid: details} JSON cache without replacing newer rows"""
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        rows = [(int(aid), json.dumps(d, ensure_ascii=False), fetched_at) for aid, d in cache.items() if d]
+        self.conn.executemany(
+            "INSERT INTO details (appid, data, fetched_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(appid) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at "
+            "WHERE excluded.fetched_at > details.fetched_at",
+            rows
+        )
+        self.conn.commit()
+        return len(rows)
+
+    def close(self):
+        self.conn.close()
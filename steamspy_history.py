@@ -0,0 +1,141 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# === Configuration Parameters ===
+HISTORY_FOLDER = "steamspy_history"
+CHANGE_ROW_GROUP_SIZE = 5000  # appid-sorted row groups let per-appid reads skip the rest
+DATE_COLUMN = "snapshot_date"
+DELETED_COLUMN = "deleted"  # set on change records of apps that left the catalog
+
+
+def comparable(df):
+    """Frame whose cells compare by value: list cells (tags, languages) become joined strings"""
+    out = df.copy()
+    for col in out.columns:
+        values = out[col].dropna()
+        if len(values) and isinstance(values.iloc[0], (list, tuple, np.ndarray)):
+            out[col] = out[col].map(lambda v: '\x1f'.join(v) if isinstance(v, (list, tuple, np.ndarray)) else v)
+    return out
+
+
+class SnapshotHistory:
+    """Daily SteamSpy snapshots stored as one base table plus per-day change records.
+
+    base_<date>.parquet holds the first snapshot; changes/<date>.parquet holds
+    only the rows that were added, changed or removed that day, so storage
+    grows with churn rather than catalog size x days.
+    """
+
+    def __init__(self, folder=HISTORY_FOLDER):
+        self.folder = folder
+        self.changes_folder = os.path.join(folder, "changes")
+        os.makedirs(self.changes_folder, exist_ok=True)
+
+    def base_path(self):
+        paths = sorted(glob.glob(os.path.join(self.folder, "base_*.parquet")))
+        return paths[0] if paths else None
+
+    def base_date(self):
+        path = self.base_path()
+        return os.path.basename(path)[len("base_"):-len(".parquet")] if path else None
+
+    def change_dates(self):
+        return sorted(os.path.basename(p)[:-len(".parquet")]
+                      for p in glob.glob(os.path.join(self.changes_folder, "*.parquet")))
+
+    def dates(self):
+        base = self.base_date()
+        return ([base] if base else []) + self.change_dates()
+
+    def change_path(self, date):
+        return os.path.join(self.changes_folder, f"{date}.parquet")
+
+    def snapshot(self, date=None, columns=None):
+        """Full catalog as of date (default: latest), replaying only the change records"""
+        base = self.base_date()
+        if base is None or (date is not None and date < base):
+            return pd.DataFrame()
+        read_cols = None if columns is None else list(dict.fromkeys(['appid', *columns]))
+        frames = [pd.read_parquet(self.base_path(), columns=read_cols)]
+        for day in self.change_dates():
+            if date is not None and day > date:
+                break
+            change_cols = None if read_cols is None else read_cols + [DELETED_COLUMN]
+            frames.append(pd.read_parquet(self.change_path(day), columns=change_cols))
+        state = pd.concat(frames, ignore_index=True).drop_duplicates('appid', keep='last')
+        if DELETED_COLUMN in state.columns:
+            state = state[~state[DELETED_COLUMN].fillna(False).astype(bool)].drop(columns=DELETED_COLUMN)
+        return state.drop(columns=DATE_COLUMN, errors='ignore').sort_values('appid').reset_index(drop=True)
+
+    def append(self, snapshot, date):
+        """Record a day's snapshot (DataFrame or Arrow table); re-recording a day replaces it"""
+        df = snapshot.to_pandas() if isinstance(snapshot, pa.Table) else snapshot.copy()
+        df = df.sort_values('appid').reset_index(drop=True)
+        base = self.base_date()
+        if base is None or (date == base and not self.change_dates()):
+            if base is not None:
+                os.remove(self.base_path())
+            self._write(df, os.path.join(self.folder, f"base_{date}.parquet"))
+            print(f"Stored base snapshot for {date}: {len(df)} apps")
+            return len(df)
+        latest = self.dates()[-1]
+        if date < latest:
+            raise ValueError(f"Snapshot for {date} is older than the latest recorded day {latest}")
+        previous = [d for d in self.dates() if d < date]
+        if not previous:
+            raise ValueError(f"Cannot replace the base snapshot for {date} once changes are recorded")
+        prev = self.snapshot(previous[-1])
+        changes = self.diff(prev, df)
+        changes.insert(1, DATE_COLUMN, date)
+        self._write(changes, self.change_path(date))
+        print(f"Stored {len(changes)} changed apps for {date} ({len(df)} in catalog)")
+        return len(changes)
+
+    @staticmethod
+    def diff(prev, new):
+        """Rows of new that are added or differ from prev, plus deletion markers"""
+        prev = prev.set_index('appid')
+        new = new.set_index('appid')
+        cols = list(dict.fromkeys([*new.columns, *prev.columns]))
+        common = new.index.intersection(prev.index)
+        a = comparable(prev.reindex(index=common, columns=cols))
+        b = comparable(new.reindex(index=common, columns=cols))
+        differs = ((a != b) & ~(a.isna() & b.isna())).any(axis=1)
+        changed = common[differs.to_numpy()]
+        added = new.index.difference(prev.index)
+        removed = prev.index.difference(new.index)
+        rows = new.loc[changed.union(added)].copy()
+        rows[DELETED_COLUMN] = False
+        gone = pd.DataFrame({DELETED_COLUMN: True}, index=removed)
+        out = pd.concat([rows, gone]) if len(gone) else rows
+        out.index.name = 'appid'
+        return out.sort_index().reset_index()
+
+    def series(self, appid, columns):
+        """Per-day values of columns for one appid, one row per day it changed"""
+        filters = [('appid', '==', int(appid))]
+        read_cols = ['appid', *columns]
+        frames = []
+        if self.base_path():
+            base = pd.read_parquet(self.base_path(), columns=read_cols, filters=filters)
+            base.insert(0, DATE_COLUMN, self.base_date())
+            frames.append(base)
+        for day in self.change_dates():
+            # Row-group statistics on the sorted appid column skip everything but this app
+            table = pq.read_table(self.change_path(day), columns=[DATE_COLUMN, *read_cols, DELETED_COLUMN],
+                                  filters=filters)
+            if table.num_rows:
+                frames.append(table.to_pandas())
+        if not frames:
+            return pd.DataFrame(columns=[DATE_COLUMN, *read_cols])
+        return pd.concat(frames, ignore_index=True)
+
+    def _write(self, df, path):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, path + ".tmp", compression='zstd', row_group_size=CHANGE_ROW_GROUP_SIZE)
+        os.replace(path + ".tmp", path)